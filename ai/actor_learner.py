@@ -0,0 +1,257 @@
+import numpy as np
+import multiprocessing as mp
+import queue
+import random
+import signal
+import time
+import sys
+import os
+
+import torch
+from torch.nn.utils import parameters_to_vector, vector_to_parameters
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.replay_buffer import ReplayBuffer
+
+
+# --- 共享記憶體經驗回放 ---
+class SharedReplayBuffer(ReplayBuffer):
+    """
+    欄位放在 multiprocessing 共享記憶體的 ReplayBuffer，actor 進程寫入、learner 抽樣。
+    寫入與讀取都持有同一把鎖，抽到的 batch 不會混到寫到一半的經驗；
+    鎖只包住陣列複製，actor 每次 push_batch 一小批，競爭很小。
+    pushed 為累計寫入筆數（= 所有 actor 的環境步數）。
+    """
+
+    _FIELDS = (
+        ("states", "f", np.float32, True),
+        ("next_states", "f", np.float32, True),
+        ("actions", "q", np.int64, False),
+        ("rewards", "f", np.float32, False),
+        ("dones", "f", np.float32, False),
+    )
+
+    def __init__(self, capacity, state_size, ctx=mp):
+        self.capacity = capacity
+        self.state_size = state_size
+        self._raw = {
+            name: ctx.RawArray(typecode, capacity * state_size if per_state else capacity)
+            for name, typecode, _, per_state in self._FIELDS
+        }
+        self._raw_counters = ctx.RawArray("q", 3)  # position, size, pushed
+        self.lock = ctx.Lock()
+        self._attach()
+
+    def _attach(self):
+        """以 NumPy 陣列檢視共享記憶體（建立時與子進程取得物件時各做一次）"""
+        for name, _, dtype, per_state in self._FIELDS:
+            array = np.frombuffer(self._raw[name], dtype=dtype)
+            setattr(self, name, array.reshape(self.capacity, self.state_size) if per_state else array)
+        self._counters = np.frombuffer(self._raw_counters, dtype=np.int64)
+
+    def __getstate__(self):
+        # 只傳共享記憶體本身，子進程再重建檢視
+        return {"capacity": self.capacity, "state_size": self.state_size, "_raw": self._raw,
+                "_raw_counters": self._raw_counters, "lock": self.lock}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._attach()
+
+    # ReplayBuffer 的 position / size 改存在共享計數器，所有進程看到同一個值
+    @property
+    def position(self):
+        return int(self._counters[0])
+
+    @position.setter
+    def position(self, value):
+        self._counters[0] = value
+
+    @property
+    def size(self):
+        return int(self._counters[1])
+
+    @size.setter
+    def size(self, value):
+        self._counters[1] = value
+
+    @property
+    def pushed(self):
+        return int(self._counters[2])
+
+    def push(self, state, action, reward, next_state, done):
+        with self.lock:
+            self._counters[2] += 1
+            return super().push(state, action, reward, next_state, done)
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        with self.lock:
+            self._counters[2] += len(actions)
+            return super().push_batch(states, actions, rewards, next_states, dones)
+
+    def get(self, indices):
+        with self.lock:
+            return super().get(indices)
+
+
+# --- 權重同步 ---
+class SharedWeights:
+    """
+    learner 把模型參數攤平寫進共享記憶體並遞增 version，actor 發現 version 變了才複製。
+    探索率跟著權重一起發佈，actor 的 epsilon 與 learner 的衰減一致。
+    """
+
+    def __init__(self, model, ctx=mp):
+        self.size = sum(p.numel() for p in model.parameters())
+        self._raw = ctx.RawArray("f", self.size)
+        self._raw_version = ctx.RawValue("q", 0)
+        self._raw_epsilon = ctx.RawValue("d", 1.0)
+        self.lock = ctx.Lock()
+
+    @property
+    def version(self):
+        return self._raw_version.value
+
+    def publish(self, model, epsilon):
+        vector = parameters_to_vector(model.parameters()).detach().cpu().numpy()
+        with self.lock:
+            np.frombuffer(self._raw, dtype=np.float32)[:] = vector
+            self._raw_epsilon.value = epsilon
+            self._raw_version.value += 1
+
+    def pull(self, model, version):
+        """version 比手上的新就載入模型，回傳 (version, epsilon)；沒有更新時 epsilon 為 None"""
+        if self._raw_version.value == version:
+            return version, None
+        with self.lock:
+            vector = np.frombuffer(self._raw, dtype=np.float32).copy()
+            version = self._raw_version.value
+            epsilon = self._raw_epsilon.value
+        vector_to_parameters(torch.from_numpy(vector), model.parameters())
+        return version, epsilon
+
+
+# --- actor 進程 ---
+def _actor_worker(rank, memory, weights, episodes, stop, step_limit, push_every, seed):
+    """
+    子進程：以最新發佈的權重跑 PixelJumperEnv，每 push_every 步把經驗寫進共享緩衝。
+    所有 actor 累計步數達到 step_limit（learner 設定，負數為不限）時先等 learner 追上。
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # 中斷由 learner 處理，再透過 stop 結束
+    random.seed(seed)  # 各 actor 的探索與世界序列不同
+    np.random.seed(seed % 2 ** 32)
+    torch.manual_seed(seed)
+    torch.set_num_threads(1)  # 小網路單筆推論，多執行緒只會互相搶 CPU
+    from ai.env import PixelJumperEnv
+    from ai.ai_model import GameAI
+
+    env = PixelJumperEnv()
+    ai = GameAI(device=torch.device("cpu"), memory_capacity=1)
+    version = -1
+    batch = ([], [], [], [], [])
+    try:
+        state = env.reset()
+        total_reward, steps = 0.0, 0
+        while not stop.is_set():
+            if not batch[0]:
+                if 0 <= step_limit.value <= memory.pushed:
+                    time.sleep(0.001)  # 領先 learner 太多，讓出 CPU
+                    continue
+                # 每批開始前檢查一次新權重
+                version, epsilon = weights.pull(ai.model, version)
+                if epsilon is not None:
+                    ai.epsilon = epsilon
+
+            action = ai.get_action(state)
+            next_state, reward, done, info = env.step(action)
+            for column, value in zip(batch, (state, action, reward, next_state, done)):
+                column.append(value)
+            total_reward += reward
+            steps += 1
+            state = next_state
+
+            if done:
+                episodes.put((rank, total_reward, steps, info["distance"]))
+                state = env.reset()
+                total_reward, steps = 0.0, 0
+            if len(batch[0]) >= push_every or done:
+                memory.push_batch(*(np.asarray(column) for column in batch))
+                batch = ([], [], [], [], [])
+    finally:
+        episodes.cancel_join_thread()  # learner 可能不再讀取佇列，結束時不等它清空
+        env.close()
+
+
+class ActorPool:
+    """
+    actor–learner 訓練的 actor 端：num_actors 個進程各跑一個 PixelJumperEnv，
+    經驗寫入共享的 SharedReplayBuffer（memory），learner 以 publish 發佈新權重，
+    完成的回合以 poll_episodes 取回 (actor, 總獎勵, 步數, 距離)。
+    limit_steps 讓 actor 最多只領先 learner 一段，CPU 不夠時不會把 learner 擠到跑不動。
+    """
+
+    def __init__(self, num_actors, ai, memory_capacity, push_every=32, seed=None, start_method=None):
+        self.num_actors = num_actors
+        ctx = mp.get_context(start_method)
+        self.memory = SharedReplayBuffer(memory_capacity, ai.state_size, ctx)
+        self.weights = SharedWeights(ai.model, ctx)
+        self.weights.publish(ai.model, ai.epsilon)  # actor 一開始就有權重可用
+        self.episodes = ctx.Queue()
+        self.stop = ctx.Event()
+        self.step_limit = ctx.RawValue("q", -1)
+
+        if seed is None:
+            seed = random.randrange(2 ** 31)
+        self.processes = []
+        for rank in range(num_actors):
+            process = ctx.Process(
+                target=_actor_worker,
+                args=(rank, self.memory, self.weights, self.episodes, self.stop, self.step_limit,
+                      push_every, seed + rank),
+                daemon=True,
+            )
+            process.start()
+            self.processes.append(process)
+        self.start_time = time.time()
+        self.closed = False
+
+    @property
+    def env_steps(self):
+        """所有 actor 累計的環境步數"""
+        return self.memory.pushed
+
+    def publish(self, ai):
+        self.weights.publish(ai.model, ai.epsilon)
+
+    def limit_steps(self, limit):
+        """actor 累計步數的上限（learner 依訓練進度調整），None 為不限"""
+        self.step_limit.value = -1 if limit is None else limit
+
+    def poll_episodes(self):
+        """取回目前已完成的回合，不阻塞"""
+        finished = []
+        while True:
+            try:
+                finished.append(self.episodes.get_nowait())
+            except queue.Empty:
+                return finished
+
+    def stats(self):
+        elapsed = time.time() - self.start_time
+        return {
+            "actor_steps": self.env_steps,
+            "actor_steps_per_sec": self.env_steps / elapsed if elapsed > 0 else 0.0,
+            "weight_version": self.weights.version,
+        }
+
+    def close(self):
+        if self.closed:
+            return
+        self.stop.set()
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.closed = True
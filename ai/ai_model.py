@@ -2,13 +2,14 @@ import numpy as np
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from collections import deque
 import random
 from game.settings import *
 import os
 import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ai.replay_buffer import ReplayBuffer, PrioritizedReplayBuffer
+from game.spatial import nearest_below
 
 class DQN(nn.Module):
     def __init__(self, input_size, output_size):
@@ -23,10 +24,14 @@ class DQN(nn.Module):
         return self.fc3(x)
 
 class GameAI:
-    def __init__(self, device):
+    def __init__(self, device, memory_capacity=10000, prioritized=False):
         self.state_size = 8  # 玩家位置(x,y)、速度(x,y)、是否在地面、跳跃次数、最近平台距离、最近障碍物距离
         self.action_size = 4  # 左移、右移、跳跃、不動
-        self.memory = deque(maxlen=10000)
+        self.prioritized = prioritized  # 使用優先經驗回放
+        if prioritized:
+            self.memory = PrioritizedReplayBuffer(memory_capacity, self.state_size)
+        else:
+            self.memory = ReplayBuffer(memory_capacity, self.state_size)
         self.gamma = 0.95    # 折扣因子
         self.epsilon = 1.0   # 探索率
         self.epsilon_min = 0.01
@@ -38,19 +43,9 @@ class GameAI:
         self.optimizer = optim.Adam(self.model.parameters(), lr=self.learning_rate)
         
     def get_state(self, player, tiles, obstacles):
-        # 获取最近平台的距离
-        nearest_platform = float('inf')
-        for tile in tiles:
-            if tile.rect.top > player.rect.bottom:  # 只考虑玩家下方的平台
-                dist = abs(tile.rect.centerx - player.rect.centerx)
-                nearest_platform = min(nearest_platform, dist)
-        
-        # 获取最近障碍物的距离
-        nearest_obstacle = float('inf')
-        for obs in obstacles:
-            if obs.rect.top > player.rect.bottom:  # 只考虑玩家前方的障碍物
-                dist = abs(obs.rect.centerx - player.rect.centerx)
-                nearest_obstacle = min(nearest_obstacle, dist)
+        # 获取玩家下方最近平台与障碍物的距离（可传入 Simulation 的 tile_heights / obstacle_heights 高度图）
+        nearest_platform = nearest_below(tiles, player.rect)
+        nearest_obstacle = nearest_below(obstacles, player.rect)
         
         state = np.array([
             player.rect.x / WIDTH,  # 归一化位置
@@ -69,26 +64,53 @@ class GameAI:
             return random.randrange(self.action_size)
         
         with torch.no_grad():
-            state = torch.FloatTensor(state).unsqueeze(0).to(self.device)
+            state = torch.from_numpy(np.asarray(state, dtype=np.float32)).unsqueeze(0).to(self.device)
             q_values = self.model(state)
             return q_values.argmax().item()
+
+    def get_actions(self, states, force_exploit=False):
+        """
+        一次為 N 個狀態（ndarray[N, state_size]）選動作，回傳 ndarray[N]。
+        epsilon-greedy 對每一列各自抽樣；需要網路的列合成一個 batch 只跑一次前向。
+        """
+        states = np.asarray(states, dtype=np.float32)
+        n = len(states)
+        if force_exploit:
+            explore = np.zeros(n, dtype=bool)
+        else:
+            explore = np.random.random(n) < self.epsilon
+        actions = np.random.randint(0, self.action_size, size=n)
+        exploit = ~explore
+        if exploit.any():
+            with torch.no_grad():
+                q_values = self.model(torch.from_numpy(states[exploit]).to(self.device))
+            actions[exploit] = q_values.argmax(1).cpu().numpy()
+        return actions
     
     def train(self, batch_size):
         if len(self.memory) < batch_size:
             return None
         
-        minibatch = random.sample(self.memory, batch_size)
-        states = torch.FloatTensor(np.array([data[0] for data in minibatch])).to(self.device)
-        actions = torch.LongTensor([data[1] for data in minibatch]).to(self.device)
-        rewards = torch.FloatTensor([data[2] for data in minibatch]).to(self.device)
-        next_states = torch.FloatTensor([data[3] for data in minibatch]).to(self.device)
-        dones = torch.FloatTensor([data[4] for data in minibatch]).to(self.device)
+        if self.prioritized:
+            batch, indices, weights = self.memory.sample(batch_size)
+        else:
+            batch = self.memory.sample(batch_size)
+        states, actions, rewards, next_states, dones = (
+            torch.from_numpy(array).to(self.device) for array in batch
+        )
         
         current_q_values = self.model(states).gather(1, actions.unsqueeze(1))
         next_q_values = self.target_model(next_states).max(1)[0].detach().to(self.device)
         target_q_values = rewards + (1 - dones) * self.gamma * next_q_values
         
-        loss = nn.MSELoss()(current_q_values.squeeze(), target_q_values)
+        if self.prioritized:
+            # importance-sampling 權重修正抽樣偏差，並以 TD error 更新優先度
+            td_errors = target_q_values - current_q_values.squeeze(1)
+            weights = torch.from_numpy(weights).to(self.device)
+            loss = (weights * td_errors.pow(2)).mean()
+            self.memory.update_priorities(indices, td_errors.detach().abs().cpu().numpy())
+        else:
+            loss = nn.MSELoss()(current_q_values.squeeze(), target_q_values)
         
         self.optimizer.zero_grad()
         loss.backward()
@@ -139,7 +161,10 @@ class GameAI:
         self.target_model.load_state_dict(self.model.state_dict())
     
     def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done)) 
+        self.memory.push(state, action, reward, next_state, done)
+
+    def remember_batch(self, states, actions, rewards, next_states, dones):
+        self.memory.push_batch(states, actions, rewards, next_states, dones)
             
     def save_model(self, episode, avg_reward, reward_version):
         save_dir = f"checkpoints/{reward_version}"
@@ -0,0 +1,364 @@
+"""
+訓練吞吐量基準測試。
+
+量測 PixelJumperEnv.step、VectorPixelJumperEnv.step、generate_chunk、地形 sprite 記憶體、畫面幀時間分布、
+GameAI.get_action / get_actions 與 InferenceServer 的推論吞吐量、GameAI.train（不同 batch size）以及 train_ai 端到端（開/關畫面、快速模式）的速度，
+結果寫成 JSON，方便在不同 commit 之間比較（僅需 CPU）。
+
+用法：
+    python ai/benchmark.py --output bench_results.json
+    python ai/benchmark.py --only env,train --quick
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import json
+import multiprocessing as mp
+import os
+import platform
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# 沒有顯示器 / 音效裝置的機器（CI、訓練主機）改用 SDL dummy driver
+if sys.platform.startswith("linux") and "DISPLAY" not in os.environ:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import numpy as np
+import torch
+
+SECTIONS = ["env", "vec_env", "chunks", "memory", "frames", "inference", "train", "e2e"]
+
+
+def _rate(count, elapsed):
+    return count / elapsed if elapsed > 0 else float("inf")
+
+
+def bench_env_step(steps, world_seed=0):
+    """PixelJumperEnv.step 每秒步數（固定世界、隨機動作，done 時 reset）"""
+    from ai.env import PixelJumperEnv
+    env = PixelJumperEnv(seed=world_seed)
+    env.reset()
+    actions = np.random.randint(0, 4, size=steps)
+    resets = 0
+    start = time.perf_counter()
+    for action in actions:
+        _, _, done, _ = env.step(int(action))
+        if done:
+            env.reset()
+            resets += 1
+    elapsed = time.perf_counter() - start
+    return {"steps": steps, "seconds": elapsed, "steps_per_sec": _rate(steps, elapsed), "resets": resets}
+
+
+def bench_vec_env_step(steps, num_envs_list, seed=0):
+    """VectorPixelJumperEnv.step 每秒環境步數"""
+    from ai.vec_env import VectorPixelJumperEnv
+    results = {}
+    for num_envs in num_envs_list:
+        env = VectorPixelJumperEnv(num_envs, seed=seed)
+        env.reset()
+        vec_steps = max(1, steps // num_envs)
+        start = time.perf_counter()
+        for _ in range(vec_steps):
+            env.step(np.random.randint(0, 4, size=num_envs))
+        elapsed = time.perf_counter() - start
+        results[str(num_envs)] = {
+            "env_steps": vec_steps * num_envs,
+            "seconds": elapsed,
+            "env_steps_per_sec": _rate(vec_steps * num_envs, elapsed),
+        }
+    return results
+
+
+def bench_chunk_generation(chunks, world_seed=0):
+    """區塊生成每秒區塊數：佔據格（generate_world_chunk_grid）與轉成 sprite（generate_world_chunk）"""
+    from game.level import generate_world_chunk, generate_world_chunk_grid
+    start = time.perf_counter()
+    cells = 0
+    for i in range(chunks):
+        cells += np.count_nonzero(generate_world_chunk_grid(world_seed, i))
+    grid_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(chunks):
+        generate_world_chunk(world_seed, i)
+    elapsed = time.perf_counter() - start
+    return {"chunks": chunks, "seconds": elapsed, "chunks_per_sec": _rate(chunks, elapsed),
+            "grid_seconds": grid_elapsed, "grid_chunks_per_sec": _rate(chunks, grid_elapsed),
+            "sprites_per_chunk": cells / chunks}
+
+
+def bench_sprite_memory(count):
+    """
+    count 個 Tile 的記憶體：Python 物件（tracemalloc）加上 Surface 像素緩衝（依不重複的 Surface 計算）。
+    per_instance_surface 為舊做法（每格各自一張 Surface），shared_surface 為目前的 Tile。
+    """
+    import pygame
+    import tracemalloc
+    from game.entities import Tile, solid_surface
+    from game.settings import GREEN, TILE_SIZE
+
+    class PerInstanceTile(pygame.sprite.Sprite):
+        def __init__(self, x, y):
+            super().__init__()
+            self.image = solid_surface(GREEN)
+            self.rect = self.image.get_rect(topleft=(x, y))
+
+    def measure(cls):
+        cls(0, 0)  # 暖機（共用 Surface 與型別快取不算在內）
+        tracemalloc.start()
+        start = time.perf_counter()
+        sprites = [cls(i % 1000 * TILE_SIZE, i // 1000 * TILE_SIZE) for i in range(count)]
+        elapsed = time.perf_counter() - start
+        python_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        surfaces = {id(sprite.image): sprite.image for sprite in sprites}
+        surface_bytes = sum(surface.get_bytesize() * surface.get_width() * surface.get_height()
+                            for surface in surfaces.values())
+        return {"sprites": count, "surfaces": len(surfaces), "python_bytes": python_bytes,
+                "surface_bytes": surface_bytes, "total_bytes": python_bytes + surface_bytes,
+                "bytes_per_sprite": (python_bytes + surface_bytes) / count,
+                "create_per_sec": _rate(count, elapsed)}
+
+    return {"per_instance_surface": measure(PerInstanceTile), "shared_surface": measure(Tile)}
+
+
+FRAME_BUCKETS_MS = [0.5, 1, 2, 4, 8, 16.7, 33.3]
+
+
+def frame_histogram(times_ms):
+    """把每幀耗時（毫秒）分到 FRAME_BUCKETS_MS 的區間，附上百分位數"""
+    times = np.asarray(times_ms)
+    edges = [0.0] + FRAME_BUCKETS_MS + [float("inf")]
+    counts, _ = np.histogram(times, bins=edges)
+    labels = [f"<{edge}" for edge in FRAME_BUCKETS_MS] + [f">={FRAME_BUCKETS_MS[-1]}"]
+    return {"frames": len(times), "histogram_ms": dict(zip(labels, counts.tolist())),
+            "p50_ms": float(np.percentile(times, 50)), "p99_ms": float(np.percentile(times, 99)),
+            "max_ms": float(times.max())}
+
+
+def bench_frame_times(frames, pregenerate, seed=0):
+    """
+    GameState 每幀 update + draw + display.update 的耗時分布（dummy 視窗、無敵模式、固定世界與輸入），
+    sections_ms 為 FrameProfiler 量到的各區段 p50 / p95 / p99。
+    另外統計跨入新區塊那幾幀（生成或第一次繪製區塊）的耗時，看區塊邊界是否造成尖峰。
+    """
+    import pygame
+    import game.entities as entities
+    from game.entities import Controls
+    from game.gamestate import GameState
+    from game.profiler import FrameProfiler
+
+    entities._dflag_ = True  # 不會死亡，才能連續跑過多個區塊
+    state = GameState(seed=seed)
+    state.pregenerate = pregenerate
+    state.profiler = profiler = FrameProfiler(window=frames)
+    state.initialize()
+    rng = random.Random(seed)
+    times, boundary_times = [], []
+    try:
+        for _ in range(frames):
+            controls = Controls(right=rng.random() < 0.8, jump=rng.random() < 0.3)
+            chunks_before = (state.generated_chunks, len(state.chunk_surfaces))
+            start = time.perf_counter()
+            state.update(controls)
+            state.draw()
+            with profiler.section("flip"):
+                pygame.display.update(state.dirty_rects)
+            elapsed = (time.perf_counter() - start) * 1000
+            profiler.end_frame()
+            times.append(elapsed)
+            if (state.generated_chunks, len(state.chunk_surfaces)) != chunks_before:
+                boundary_times.append(elapsed)
+            if state.game_over:
+                state.initialize()
+    finally:
+        entities._dflag_ = False
+    result = frame_histogram(times)
+    result["chunks_generated"] = int(state.generated_chunks)
+    result["boundary_frames"] = frame_histogram(boundary_times) if boundary_times else None
+    result["sections_ms"] = profiler.percentiles()
+    return result
+
+
+def bench_inference(samples, batch_sizes, threads=16):
+    """
+    每秒可選幾個動作（貪婪策略，CPU）：逐筆 get_action、get_actions 批次，
+    以及 threads 個執行緒各自逐筆呼叫 InferenceServer.act 時的吞吐量與平均 batch 大小。
+    """
+    import threading
+    from ai.ai_model import GameAI
+    from ai.inference import InferenceServer
+
+    ai = GameAI(torch.device("cpu"), memory_capacity=1)
+    states = np.random.rand(samples, ai.state_size).astype(np.float32)
+    results = {}
+
+    start = time.perf_counter()
+    for state in states:
+        ai.get_action(state, force_exploit=True)
+    results["get_action"] = {"samples_per_sec": _rate(samples, time.perf_counter() - start)}
+
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, samples, batch_size):
+            ai.get_actions(states[i:i + batch_size], force_exploit=True)
+        results[f"get_actions_{batch_size}"] = {"samples_per_sec": _rate(samples, time.perf_counter() - start)}
+
+    server = InferenceServer(ai, max_batch=threads, force_exploit=True)
+    per_thread = samples // threads
+
+    def worker(rows):
+        for state in rows:
+            server.act(state)
+
+    workers = [threading.Thread(target=worker, args=(states[i * per_thread:(i + 1) * per_thread],))
+               for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    server.close()
+    results["server"] = {"threads": threads, "samples_per_sec": _rate(per_thread * threads, elapsed),
+                         "mean_batch": server.stats()["mean_batch"]}
+    return results
+
+
+def bench_train(batches, batch_sizes, prioritized=False):
+    """GameAI.train 每秒 batch 數（回放緩衝先填滿隨機經驗）"""
+    from ai.ai_model import GameAI
+    results = {}
+    for batch_size in batch_sizes:
+        ai = GameAI(torch.device("cpu"), memory_capacity=10000, prioritized=prioritized)
+        n = ai.memory.capacity
+        ai.remember_batch(np.random.rand(n, ai.state_size).astype(np.float32),
+                          np.random.randint(0, ai.action_size, size=n),
+                          np.random.randn(n).astype(np.float32),
+                          np.random.rand(n, ai.state_size).astype(np.float32),
+                          np.random.rand(n) < 0.01)
+        ai.train(batch_size)  # 暖機
+        start = time.perf_counter()
+        for _ in range(batches):
+            ai.train(batch_size)
+        elapsed = time.perf_counter() - start
+        results[str(batch_size)] = {"batches": batches, "seconds": elapsed,
+                                    "batches_per_sec": _rate(batches, elapsed),
+                                    "samples_per_sec": _rate(batches * batch_size, elapsed)}
+    return results
+
+
+def _end_to_end_worker(episodes, render, fast, seed):
+    from ai.train_ai import train_ai
+    handlers = (signal.getsignal(signal.SIGINT), signal.getsignal(signal.SIGTERM))
+    with tempfile.TemporaryDirectory() as model_dir:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            train_ai(episodes=episodes, render=render, model_dir=model_dir, fast=fast, seed=seed)
+        elapsed = time.perf_counter() - start
+    signal.signal(signal.SIGINT, handlers[0])
+    signal.signal(signal.SIGTERM, handlers[1])
+    return {"episodes": episodes, "render": render, "fast": fast, "seconds": elapsed,
+            "episodes_per_hour": _rate(episodes, elapsed) * 3600}
+
+
+def bench_end_to_end(episodes, render, fast=False, seed=0):
+    """
+    train_ai 端到端每小時回合數（暫存目錄，不影響 models/）。
+    train_ai 結束時會 pygame.quit()，每次量測都在新的進程裡跑。
+    """
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+        return pool.submit(_end_to_end_worker, episodes, render, fast, seed).result()
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sections=SECTIONS, quick=False, seed=0):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+    scale = 0.1 if quick else 1.0
+    results = {}
+    if "env" in sections:
+        results["env_step"] = bench_env_step(int(20000 * scale), world_seed=seed)
+    if "vec_env" in sections:
+        results["vec_env_step"] = bench_vec_env_step(int(200000 * scale), [16, 64, 256], seed=seed)
+    if "chunks" in sections:
+        results["chunk_generation"] = bench_chunk_generation(int(500 * scale), world_seed=seed)
+    if "frames" in sections:
+        frames = int(6000 * scale)
+        results["frame_times"] = {
+            "pregenerate": bench_frame_times(frames, pregenerate=True, seed=seed),
+            "synchronous": bench_frame_times(frames, pregenerate=False, seed=seed),
+        }
+    if "memory" in sections:
+        results["sprite_memory"] = bench_sprite_memory(int(10000 * scale))
+    if "inference" in sections:
+        results["inference"] = bench_inference(int(20000 * scale), [16, 64, 256])
+    if "train" in sections:
+        results["train"] = bench_train(int(500 * scale), [32, 64, 128, 256])
+        results["train_prioritized"] = bench_train(int(500 * scale), [64], prioritized=True)
+    if "e2e" in sections:
+        episodes = max(1, int(10 * scale))
+        results["end_to_end"] = {
+            "render_off": bench_end_to_end(episodes, render=False, seed=seed),
+            "render_on": bench_end_to_end(episodes, render=True, seed=seed),
+            "fast": bench_end_to_end(episodes, render=False, fast=True, seed=seed),
+        }
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "numpy": np.__version__,
+        "quick": quick,
+        "seed": seed,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pixel Jumper 訓練吞吐量基準測試')
+    parser.add_argument('--output', default='bench_results.json', help='JSON 結果輸出路徑')
+    parser.add_argument('--only', default=','.join(SECTIONS),
+                        help=f'要跑的項目（逗號分隔）：{",".join(SECTIONS)}')
+    parser.add_argument('--quick', action='store_true', help='縮小規模，快速檢查用')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    sections = [name.strip() for name in args.only.split(',') if name.strip()]
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"未知的項目: {', '.join(sorted(unknown))}")
+
+    report = run_benchmarks(sections, quick=args.quick, seed=args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report["results"], indent=2))
+    print(f"結果已寫入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
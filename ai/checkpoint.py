@@ -0,0 +1,111 @@
+import os
+import re
+import queue
+import tempfile
+import threading
+
+import torch
+
+# --- 背景存檔 ---
+# 訓練執行緒只複製一份 state_dict（CPU 上的小張量）就繼續，
+# torch.save 與寫檔在背景執行緒做：先寫暫存檔再 os.replace，中途被砍也不會留下寫一半的模型。
+# 依檔名套用保留規則，models/ 不會無限長大；只刪這次訓練自己寫的檔案，之前留下的不動。
+
+PERIODIC_PATTERN = re.compile(r"^dqn_model_episode_(\d+)\.pth$")
+BEST_PATTERN = re.compile(r"^best_model_ep(\d+)_reward(-?\d+(?:\.\d+)?)\.pth$")
+
+
+class CheckpointWriter:
+    """
+    在背景執行緒寫入 model_dir 下的模型檔。
+    dqn_model_episode_N.pth 只保留回合數最大的 keep_last 個，
+    best_model_epN_rewardR.pth 只保留 R 最高的 keep_best 個（None 或 <= 0 為全部保留）；
+    其他檔名（best_model.pth、dqn_model_final.pth）每次直接覆寫、不刪除。
+    保留規則只計算這個 writer 寫過的檔案，model_dir 原本就有的檔案不會被刪。
+    """
+
+    def __init__(self, model_dir, keep_last=5, keep_best=3):
+        self.model_dir = model_dir
+        # 與 --keep-last / --keep-best 相同，0 表示全部保留而不是一個都不留
+        self.keep_last = keep_last if keep_last and keep_last > 0 else None
+        self.keep_best = keep_best if keep_best and keep_best > 0 else None
+        self.periodic = {}  # 檔名 -> 回合數
+        self.best = {}  # 檔名 -> 平均獎勵
+        # mkstemp 建的暫存檔權限是 0600，改名前換成一般檔案依 umask 會有的權限
+        umask = os.umask(0)
+        os.umask(umask)
+        self.file_mode = 0o666 & ~umask
+        self.errors = []
+        self.queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+        self.closed = False
+
+    def save(self, state_dict, filename):
+        """複製 state_dict 後排進背景寫入，立刻返回"""
+        snapshot = {key: value.detach().to("cpu", copy=True) for key, value in state_dict.items()}
+        self.queue.put((snapshot, filename))
+
+    def flush(self):
+        """等目前排隊的檔案都寫完"""
+        self.queue.join()
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self.queue.put(False)
+        self._thread.join()
+        self.closed = True
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            try:
+                if job is False:
+                    return
+                snapshot, filename = job
+                self._write(snapshot, filename)
+                self._track(filename)
+                self._prune()
+            except Exception as exc:  # 存檔失敗不該讓訓練中止，記下來並提示
+                self.errors.append(exc)
+                print(f"❌ 模型存檔失敗：{exc}")
+            finally:
+                self.queue.task_done()
+
+    def _write(self, snapshot, filename):
+        path = os.path.join(self.model_dir, filename)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{filename}.", suffix=".tmp", dir=self.model_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                torch.save(snapshot, f)
+                f.flush()
+                os.fsync(f.fileno())
+            # 覆寫既有檔案時沿用它的權限
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777 if os.path.exists(path) else self.file_mode)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _track(self, filename):
+        match = PERIODIC_PATTERN.match(filename)
+        if match:
+            self.periodic[filename] = int(match.group(1))
+            return
+        match = BEST_PATTERN.match(filename)
+        if match:
+            self.best[filename] = float(match.group(2))
+
+    def _prune(self):
+        for files, keep in ((self.periodic, self.keep_last), (self.best, self.keep_best)):
+            if keep is None or len(files) <= keep:
+                continue
+            for filename in sorted(files, key=files.get, reverse=True)[keep:]:
+                del files[filename]
+                try:
+                    os.remove(os.path.join(self.model_dir, filename))
+                except FileNotFoundError:
+                    pass
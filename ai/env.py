@@ -10,13 +10,25 @@ from game.settings import WIDTH, HEIGHT
 import gym
 from gym import spaces
 from game.gamestate import GameState
+from game.entities import Controls
+from game.spatial import nearest_below
+
+# 動作編號對應的輸入
+ACTION_CONTROLS = [
+    Controls(),             # 0 = 不動
+    Controls(left=True),    # 1 = 左
+    Controls(right=True),   # 2 = 右
+    Controls(jump=True),    # 3 = 跳
+]
 
 class PixelJumperEnv(gym.Env):
-    def __init__(self):
+    def __init__(self, seed=None):
         super(PixelJumperEnv, self).__init__()
 
-        # 初始化遊戲
-        self.game = GameState()
+        # 初始化遊戲（不開視窗，第一次 render 時才建立）
+        # seed 固定時每回合都是同一個世界（評估用），None 則每回合換新世界
+        self.game = GameState(headless=True, seed=seed)
+        self.game.pregenerate = False  # 訓練不在意單幀耗時，需要區塊時再一次生成即可
         self.game.initialize()
 
         # 定義動作空間 (0 = 不動，1 = 左，2 = 右，3 = 跳)
@@ -35,22 +47,14 @@ class PixelJumperEnv(gym.Env):
         self.steps = 0
         self.prev_health = self.game.player.health
         self.last_x = self.game.player.rect.x
+        self._update_features()
         obs = self._get_obs()
         return obs
 
     def step(self, action):
-        # 執行動作
-        if action == 1:  # 左移
-            self.game.player.rect.x -= 5
-        elif action == 2:  # 右移
-            self.game.player.rect.x += 5
-        elif action == 3:  # 跳躍
-            if self.game.player.jump_count < self.game.player.max_jump_count:
-                self.game.player.vel_y = -15
-                self.game.player.jump_count += 1
-
-        # 更新遊戲狀態
-        self.game.update()
+        # 執行動作並更新遊戲狀態
+        self.game.update(ACTION_CONTROLS[action])
+        self._update_features()
 
         # 獲取觀察和獎勵
         obs = self._get_obs()
@@ -65,26 +69,18 @@ class PixelJumperEnv(gym.Env):
 
         return obs, reward, done, info
 
+    def _update_features(self):
+        """每步只查一次最近平台與障礙物（整個滑動視窗的高度圖），觀察與獎勵共用"""
+        player_rect = self.game.player.rect
+        self.nearest_platform = nearest_below(self.game.tile_heights, player_rect)
+        self.nearest_obstacle = nearest_below(self.game.obstacle_heights, player_rect)
+
     def _is_near_platform(self):
-        for tile in self.game.tiles:
-            if abs(tile.rect.centerx - self.game.player.rect.centerx) < 50 and tile.rect.top > self.game.player.rect.bottom:
-                return True
-        return False
+        return self.nearest_platform < 50
 
-    
     def _get_obs(self):
-        # 獲取最近平台和障礙物的距離
-        nearest_platform = float('inf')
-        for tile in self.game.tiles:
-            if tile.rect.top > self.game.player.rect.bottom:
-                dist = abs(tile.rect.centerx - self.game.player.rect.centerx)
-                nearest_platform = min(nearest_platform, dist)
-
-        nearest_obstacle = float('inf')
-        for obs in self.game.obstacles:
-            if obs.rect.top > self.game.player.rect.bottom:
-                dist = abs(obs.rect.centerx - self.game.player.rect.centerx)
-                nearest_obstacle = min(nearest_obstacle, dist)
+        nearest_platform = self.nearest_platform
+        nearest_obstacle = self.nearest_obstacle
 
         # 構建觀察向量
         obs = np.array([
@@ -102,13 +98,7 @@ class PixelJumperEnv(gym.Env):
     def _get_reward(self):
         
         reward = 0.0
-        
-        # 獲取最近平台和障礙物的距離
-        nearest_obstacle = float('inf')
-        for obs in self.game.obstacles:
-            if obs.rect.top > self.game.player.rect.bottom:
-                dist = abs(obs.rect.centerx - self.game.player.rect.centerx)
-                nearest_obstacle = min(nearest_obstacle, dist)
+        nearest_obstacle = self.nearest_obstacle
 
         
         # 計算水平位移差作為前進獎勵
@@ -148,10 +138,11 @@ class PixelJumperEnv(gym.Env):
 
 
     def render(self, mode="human"):
-        if self.game.screen:
-            self.game.draw()
-            pygame.display.flip()
-            pygame.event.pump()
+        if self.game.screen is None:
+            self.game.open_display()
+        self.game.draw()
+        pygame.display.flip()
+        pygame.event.pump()
 
     def close(self):
         pygame.quit()
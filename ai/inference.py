@@ -0,0 +1,93 @@
+import numpy as np
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class InferenceServer:
+    """
+    同一進程內的批次推論服務：多個環境執行緒以 act / submit 送出單一狀態，
+    背景執行緒把同時等待的請求合成一個 batch，只跑一次 GameAI.get_actions。
+    第一個請求到達後最多等 max_latency_ms，或湊滿 max_batch 就立刻推論。
+    policy 只要有 get_actions(states, force_exploit)，例如 GameAI 或 NumpyDQN。
+    """
+
+    def __init__(self, policy, max_batch=64, max_latency_ms=2.0, force_exploit=False):
+        self.policy = policy
+        self.max_batch = max_batch
+        self.max_latency = max_latency_ms / 1000
+        self.force_exploit = force_exploit
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.requests_served = 0
+        self.closed = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name="inference-server", daemon=True)
+        self._thread.start()
+
+    def submit(self, state):
+        """送出一個狀態，回傳之後會拿到動作的 Future；close 之後再送會丟出 RuntimeError"""
+        if self.closed:
+            raise RuntimeError("InferenceServer 已關閉")
+        future = Future()
+        self.requests.put((state, future))
+        # 與 close 同時發生時，close 的清空可能已經結束，這裡自己取消，不讓 act 永遠等下去
+        if self.closed:
+            self._cancel_pending()
+        return future
+
+    def act(self, state):
+        """送出一個狀態並等待動作"""
+        return self.submit(state).result()
+
+    def _collect(self):
+        """等第一個請求，再在期限內盡量多收幾個"""
+        try:
+            pending = [self.requests.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.perf_counter() + self.max_latency
+        while len(pending) < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            try:
+                pending.append(self.requests.get(timeout=timeout) if timeout > 0 else self.requests.get_nowait())
+            except queue.Empty:
+                break
+        return pending
+
+    def _serve(self):
+        while not self._stop.is_set():
+            pending = self._collect()
+            if not pending:
+                continue
+            states, futures = zip(*pending)
+            try:
+                actions = self.policy.get_actions(np.stack(states), force_exploit=self.force_exploit)
+            except Exception as exc:  # 推論失敗要讓等待中的執行緒收到錯誤，而不是永遠卡住
+                for future in futures:
+                    future.set_exception(exc)
+                continue
+            for future, action in zip(futures, actions.tolist()):
+                future.set_result(action)
+            self.batches += 1
+            self.requests_served += len(pending)
+
+    def stats(self):
+        return {"batches": self.batches, "requests": self.requests_served,
+                "mean_batch": self.requests_served / self.batches if self.batches else 0.0}
+
+    def close(self):
+        self.closed = True
+        self._stop.set()
+        self._thread.join()
+        self._cancel_pending()
+
+    def _cancel_pending(self):
+        """取消還在排隊的請求（關閉後不會有人處理）"""
+        while True:
+            try:
+                _, future = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            future.cancel()
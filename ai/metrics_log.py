@@ -0,0 +1,213 @@
+import numpy as np
+import csv
+import json
+import os
+import time
+from datetime import datetime
+
+# --- 訓練紀錄（只附加的二進位檔） ---
+# 檔案 = 64 bytes 表頭 + 每回合一筆固定長度的紀錄。
+# 每回合只在檔尾寫 32 bytes，不必重寫整個檔案；紀錄可用 np.memmap 直接讀，
+# 續訓只讀表頭與最後 100 筆。需要表格時再用 export_csv 轉出。
+
+MAGIC = b"PJMETRIC"
+VERSION = 1
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("record_size", "<u4"),
+    ("saved_episodes", "<i8"),     # 最後一次存模型時的回合數（dqn_model_episode_N.pth），續訓從這裡接
+    ("best_avg_reward", "<f8"),
+    ("epsilon", "<f8"),            # 最後一次存模型時的探索率
+    ("reserved", "V24"),
+])
+RECORD_DTYPE = np.dtype([
+    ("episode", "<i8"),
+    ("reward", "<f4"),
+    ("steps", "<i4"),
+    ("epsilon", "<f4"),
+    ("loss", "<f4"),               # 這回合期間的平均訓練 loss，沒有訓練時為 NaN
+    ("timestamp", "<f8"),          # time.time()
+])
+
+
+class MetricsLog:
+    """
+    每回合一筆的訓練紀錄檔。append 為 O(1)；len(log) 為紀錄數；
+    records() 回傳唯讀的 np.memmap，tail(n) / window_mean 只讀最後 n 筆。
+    檔尾若有寫到一半的紀錄（訓練中途被砍）會在開啟時截掉。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if not os.path.exists(path) or os.path.getsize(path) < HEADER_DTYPE.itemsize:
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header["magic"] = MAGIC
+            header["version"] = VERSION
+            header["record_size"] = RECORD_DTYPE.itemsize
+            header["best_avg_reward"] = -np.inf
+            header["epsilon"] = np.nan
+            with open(path, "wb") as f:
+                f.write(header.tobytes())
+
+        self.file = open(path, "r+b")
+        self.header = np.frombuffer(self.file.read(HEADER_DTYPE.itemsize), dtype=HEADER_DTYPE).copy()
+        if self.header["magic"][0] != MAGIC or self.header["record_size"][0] != RECORD_DTYPE.itemsize:
+            self.file.close()
+            raise ValueError(f"{path} 不是相容的訓練紀錄檔")
+        if self.header["version"][0] > VERSION:
+            self.file.close()
+            raise ValueError(f"{path} 的版本 {self.header['version'][0]} 比程式支援的 {VERSION} 新")
+
+        body = os.path.getsize(path) - HEADER_DTYPE.itemsize
+        self.count = body // RECORD_DTYPE.itemsize
+        if body % RECORD_DTYPE.itemsize:
+            self.truncate(self.count)
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- 表頭 ---
+    @property
+    def saved_episodes(self):
+        return int(self.header["saved_episodes"][0])
+
+    @property
+    def best_avg_reward(self):
+        return float(self.header["best_avg_reward"][0])
+
+    @property
+    def epsilon(self):
+        return float(self.header["epsilon"][0])
+
+    def update_header(self, **fields):
+        """改寫表頭欄位（saved_episodes / best_avg_reward / epsilon），只寫 64 bytes"""
+        for name, value in fields.items():
+            self.header[name] = value
+        self.file.seek(0)
+        self.file.write(self.header.tobytes())
+        self.file.flush()
+
+    # --- 紀錄 ---
+    def append(self, episode, reward, steps, epsilon, loss=float("nan"), timestamp=None):
+        record = np.zeros(1, dtype=RECORD_DTYPE)
+        record[0] = (episode, reward, steps, epsilon, loss, time.time() if timestamp is None else timestamp)
+        self.file.seek(0, os.SEEK_END)
+        self.file.write(record.tobytes())
+        self.file.flush()
+        self.count += 1
+
+    def append_many(self, records):
+        """一次寫入多筆（RECORD_DTYPE 的結構陣列），轉換舊格式時用"""
+        records = np.asarray(records, dtype=RECORD_DTYPE)
+        self.file.seek(0, os.SEEK_END)
+        self.file.write(records.tobytes())
+        self.file.flush()
+        self.count += len(records)
+
+    def truncate(self, count):
+        """只保留前 count 筆（續訓時丟掉最後一次存模型之後的紀錄）"""
+        self.count = min(count, self.count)
+        self.file.truncate(HEADER_DTYPE.itemsize + self.count * RECORD_DTYPE.itemsize)
+        self.file.flush()
+
+    def truncate_after(self, episode):
+        """丟掉 episode 之後的紀錄（續訓從最後一次存模型的回合接上），回傳保留的筆數"""
+        keep = int(np.searchsorted(self.records()["episode"], episode, side="right")) if self.count else 0
+        self.truncate(keep)
+        return keep
+
+    def records(self):
+        """所有紀錄的唯讀 memmap（沒有紀錄時為空陣列）"""
+        if self.count == 0:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.memmap(self.path, dtype=RECORD_DTYPE, mode="r",
+                         offset=HEADER_DTYPE.itemsize, shape=(self.count,))
+
+    def tail(self, n):
+        """最後 n 筆紀錄（複本），只讀檔尾"""
+        n = min(n, self.count)
+        if n == 0:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        self.file.seek(HEADER_DTYPE.itemsize + (self.count - n) * RECORD_DTYPE.itemsize)
+        return np.frombuffer(self.file.read(n * RECORD_DTYPE.itemsize), dtype=RECORD_DTYPE).copy()
+
+    def window_mean(self, field, n=100):
+        """最後 n 筆 field 的平均（忽略 NaN），沒有紀錄時為 NaN"""
+        values = self.tail(n)[field]
+        return float(np.nanmean(values)) if len(values) and not np.isnan(values).all() else float("nan")
+
+    def export_csv(self, path, window=100):
+        """轉成 CSV：每回合一列，附上前 window 回合（含）的平均獎勵與步數，回傳列數"""
+        records = self.records()
+        avg_reward = _rolling_mean(records["reward"], window)
+        avg_steps = _rolling_mean(records["steps"], window)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Episode", "Reward", "Steps", "Epsilon", "Loss",
+                             f"Avg{window}_Reward", f"Avg{window}_Steps", "Timestamp"])
+            for record, reward_mean, steps_mean in zip(records, avg_reward, avg_steps):
+                timestamp = record["timestamp"]
+                writer.writerow([
+                    int(record["episode"]), f"{record['reward']:.6g}", int(record["steps"]),
+                    f"{record['epsilon']:.6g}", f"{record['loss']:.6g}", f"{reward_mean:.6g}", f"{steps_mean:.6g}",
+                    datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S") if np.isfinite(timestamp) else "",
+                ])
+        return len(records)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+def _rolling_mean(values, window):
+    """每個位置往前 window 筆（不足時為全部）的平均"""
+    values = np.asarray(values, dtype=np.float64)
+    cumsum = np.concatenate(([0.0], np.cumsum(values)))
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (cumsum[ends] - cumsum[starts]) / (ends - starts)
+
+
+def import_training_data(json_path, log):
+    """把舊版 training_data.json 的每回合獎勵與步數轉進 log（沒有的欄位記為 NaN，缺的步數記為 0），回傳其中的 episode"""
+    with open(json_path, "r") as f:
+        data = json.load(f)
+    rewards = data.get("episode_rewards", [])
+    steps = data.get("episode_steps", [])
+    records = np.zeros(len(rewards), dtype=RECORD_DTYPE)
+    records["episode"] = np.arange(1, len(rewards) + 1)
+    records["reward"] = rewards
+    steps = steps[:len(rewards)]
+    records["steps"][:len(steps)] = steps  # 步數比獎勵少時，缺的回合記為 0
+    records["epsilon"] = np.nan
+    records["loss"] = np.nan
+    records["timestamp"] = np.nan
+    log.append_many(records)
+    episode = data.get("episode", len(rewards))
+    log.update_header(saved_episodes=episode,
+                      best_avg_reward=data.get("best_avg_reward", -float("inf")),
+                      epsilon=data.get("epsilon", float("nan")))
+    return episode
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='查看訓練紀錄檔或轉成 CSV')
+    parser.add_argument('path', help='metrics.bin')
+    parser.add_argument('--csv', help='輸出 CSV 的路徑')
+    parser.add_argument('--window', type=int, default=100, help='平均的回合數')
+    args = parser.parse_args()
+
+    with MetricsLog(args.path) as log:
+        print(f"{len(log)} 回合，最後存檔於第 {log.saved_episodes} 回合，"
+              f"最佳平均獎勵 {log.best_avg_reward:.2f}，"
+              f"最近 {args.window} 回合平均獎勵 {log.window_mean('reward', args.window):.2f}")
+        if args.csv:
+            print(f"已輸出 {log.export_csv(args.csv, args.window)} 列到 {args.csv}")
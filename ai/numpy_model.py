@@ -0,0 +1,110 @@
+import numpy as np
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# --- 匯出給遊玩模式用的 NumPy 模型 ---
+# 遊玩只需要 DQN 的前向（8 -> 128 -> 64 -> 4 的小 MLP），
+# 把 .pth 的權重轉成 .npz 後就能只用 NumPy 推論，不必為了它載入整個 PyTorch。
+# 只有 export_model 需要 torch，而且在函式裡才 import。
+
+LAYERS = ("fc1", "fc2", "fc3")
+
+
+def export_model(pth_path, out_path=None, quantize=False):
+    """
+    把 DQN 的 .pth 轉成 .npz（預設與 .pth 同名），回傳輸出路徑。
+    quantize=True 時權重以 int8 儲存（每個輸出神經元各一個縮放係數），bias 仍為 float32。
+    """
+    import torch
+    out_path = out_path or os.path.splitext(pth_path)[0] + ".npz"
+    state_dict = torch.load(pth_path, map_location="cpu")
+    arrays = {}
+    for layer in LAYERS:
+        weight = state_dict[f"{layer}.weight"].numpy().astype(np.float32)
+        arrays[f"{layer}.bias"] = state_dict[f"{layer}.bias"].numpy().astype(np.float32)
+        if quantize:
+            # 對稱量化：每列的最大絕對值對應到 127
+            scale = np.abs(weight).max(axis=1) / 127
+            scale[scale == 0] = 1.0
+            arrays[f"{layer}.weight"] = np.round(weight / scale[:, None]).astype(np.int8)
+            arrays[f"{layer}.scale"] = scale.astype(np.float32)
+        else:
+            arrays[f"{layer}.weight"] = weight
+    np.savez(out_path, **arrays)
+    return out_path
+
+
+class NumpyDQN:
+    """
+    以 NumPy 執行 DQN 前向的遊玩用模型，介面與 GameAI 的選動作相同（一律貪婪）。
+    int8 權重在載入時還原成 float32，推論與 float 權重的路徑相同。
+    """
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.layers = []
+            for layer in LAYERS:
+                weight = data[f"{layer}.weight"]
+                if weight.dtype == np.int8:
+                    weight = weight.astype(np.float32) * data[f"{layer}.scale"][:, None]
+                # 存成 (in, out) 的連續陣列，前向直接 x @ weight
+                self.layers.append((np.ascontiguousarray(weight.T), data[f"{layer}.bias"]))
+        self.state_size = self.layers[0][0].shape[0]
+        self.action_size = self.layers[-1][0].shape[1]
+        self.epsilon = 0.0
+
+    def forward(self, states):
+        """states: ndarray[N, state_size]，回傳 Q 值 ndarray[N, action_size]"""
+        x = np.asarray(states, dtype=np.float32)
+        for weight, bias in self.layers[:-1]:
+            x = np.maximum(x @ weight + bias, 0)
+        weight, bias = self.layers[-1]
+        return x @ weight + bias
+
+    def get_action(self, state, force_exploit=True):
+        return int(self.forward(np.asarray(state, dtype=np.float32)[None])[0].argmax())
+
+    def get_actions(self, states, force_exploit=True):
+        return self.forward(states).argmax(1)
+
+
+def load_play_model(path):
+    """
+    載入遊玩用模型：給 .npz 直接載入；給 .pth 則使用同名 .npz，
+    不存在或比 .pth 舊時先匯出一次（只有這時才需要 torch）。
+    """
+    if path.endswith(".pth"):
+        npz_path = os.path.splitext(path)[0] + ".npz"
+        if not os.path.exists(npz_path) or os.path.getmtime(npz_path) < os.path.getmtime(path):
+            export_model(path, npz_path)
+        path = npz_path
+    return NumpyDQN(path)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='把 DQN 的 .pth 匯出成 NumPy 推論用的 .npz')
+    parser.add_argument('pth', help='訓練好的模型（.pth）')
+    parser.add_argument('-o', '--output', help='輸出路徑，預設與 .pth 同名的 .npz')
+    parser.add_argument('--int8', action='store_true', help='權重以 int8 量化儲存')
+    parser.add_argument('--check', type=int, default=10000,
+                        help='以幾個隨機狀態比對 PyTorch 與 NumPy 的動作，0 為不比對')
+    args = parser.parse_args()
+
+    out_path = export_model(args.pth, args.output, quantize=args.int8)
+    print(f"已匯出 {out_path}（{os.path.getsize(out_path) / 1024:.1f} KB）")
+
+    if args.check:
+        import torch
+        from ai.ai_model import DQN
+        model = NumpyDQN(out_path)
+        reference = DQN(model.state_size, model.action_size)
+        reference.load_state_dict(torch.load(args.pth, map_location="cpu"))
+        states = np.random.rand(args.check, model.state_size).astype(np.float32)
+        with torch.no_grad():
+            expected = reference(torch.from_numpy(states)).argmax(1).numpy()
+        agreement = (model.get_actions(states) == expected).mean()
+        print(f"與 PyTorch 動作一致率：{agreement:.2%}（{args.check} 個隨機狀態）")
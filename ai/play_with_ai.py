@@ -1,26 +1,44 @@
-from ai_model import GameAI
-from env import PixelJumperEnv
-import torch
 import time
+import sys
+import os
 
-# 初始化
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-env = PixelJumperEnv()
-ai = GameAI(device)
+# 添加項目根目錄到Python路徑
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ai.env import PixelJumperEnv
+from ai.numpy_model import load_play_model
 
-# 載入最佳模型
-ai.load("models/v3-platform-tune/best_model.pth")
+DEFAULT_MODEL = "models/v3-platform-tune/best_model.pth"
 
-state = env.reset()
-total_reward = 0
-done = False
 
-while not done:
-    env.render()  # 可選：顯示畫面
-    time.sleep(1/60)   # 控制遊戲速度
-    action = ai.get_action(state, force_exploit=True)  # 👈 禁用 epsilon，強制使用訓練結果
-    state, reward, done, _ = env.step(action)
-    total_reward += reward
+def play_with_ai(model_path=DEFAULT_MODEL, render=True):
+    """
+    以訓練好的模型玩一局，回傳總獎勵。
+    模型以 NumPy 推論（.pth 第一次使用時自動匯出成 .npz），遊玩時不載入 PyTorch。
+    """
+    env = PixelJumperEnv()
+    ai = load_play_model(model_path)
 
-print(f"🎉 AI 完成一局，總獎勵：{total_reward:.2f}")
-env.close()
+    state = env.reset()
+    total_reward = 0
+    done = False
+
+    while not done:
+        if render:
+            env.render()  # 可選：顯示畫面
+            time.sleep(1/60)   # 控制遊戲速度
+        action = ai.get_action(state)  # 匯出的模型一律使用訓練結果，不探索
+        state, reward, done, _ = env.step(action)
+        total_reward += reward
+
+    print(f"🎉 AI 完成一局，總獎勵：{total_reward:.2f}")
+    env.close()
+    return total_reward
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='讓訓練好的 AI 玩一局')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help='模型路徑（.pth 或匯出的 .npz）')
+    parser.add_argument('--no-render', action='store_true', help='不顯示畫面')
+    args = parser.parse_args()
+    play_with_ai(args.model, render=not args.no_render)
@@ -0,0 +1,153 @@
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+    固定容量的環狀經驗回放緩衝。
+    所有欄位預先配置成 NumPy 陣列，寫入 O(1)，抽樣用向量化索引，
+    抽出的 batch 是連續陣列，可直接 torch.from_numpy 而不必再複製。
+    """
+
+    def __init__(self, capacity, state_size):
+        self.capacity = capacity
+        self.states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.float32)
+        self.position = 0  # 下一筆寫入的位置
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, state, action, reward, next_state, done):
+        """寫入一筆經驗，滿了就覆蓋最舊的"""
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return i
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        """一次寫入多筆經驗（向量環境用），回傳寫入的索引"""
+        indices = (self.position + np.arange(len(actions))) % self.capacity
+        self.states[indices] = states
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.next_states[indices] = next_states
+        self.dones[indices] = dones
+        self.position = int(indices[-1] + 1) % self.capacity
+        self.size = min(self.size + len(actions), self.capacity)
+        return indices
+
+    def sample_indices(self, batch_size):
+        return np.random.randint(0, self.size, size=batch_size)
+
+    def get(self, indices):
+        """依索引取出 (states, actions, rewards, next_states, dones)"""
+        return (self.states[indices],
+                self.actions[indices],
+                self.rewards[indices],
+                self.next_states[indices],
+                self.dones[indices])
+
+    def sample(self, batch_size):
+        return self.get(self.sample_indices(batch_size))
+
+
+class SumTree:
+    """
+    陣列實作的完全二元樹，葉節點存優先度、內部節點存子樹總和。
+    更新與依前綴和找葉節點都是 O(log n)，而且對整個 batch 向量化。
+    """
+
+    def __init__(self, capacity):
+        self.leaf_count = 1
+        while self.leaf_count < capacity:
+            self.leaf_count *= 2
+        self.tree = np.zeros(2 * self.leaf_count, dtype=np.float64)  # tree[1] 為根
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    def get(self, indices):
+        return self.tree[np.asarray(indices) + self.leaf_count]
+
+    def update(self, indices, priorities):
+        """設定葉節點優先度，並逐層往上重算總和"""
+        nodes = np.asarray(indices) + self.leaf_count
+        self.tree[nodes] = priorities
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            if nodes[0] == 1:
+                break
+            nodes = np.unique(nodes // 2)
+
+    def find(self, values):
+        """找出前綴和落在 values 的葉節點索引"""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.leaf_count:
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = values >= left_sum
+            values = np.where(go_right, values - left_sum, values)
+            nodes = np.where(go_right, left + 1, left)
+        return nodes - self.leaf_count
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    依 TD error 優先度抽樣的經驗回放（Prioritized Experience Replay）。
+    抽樣機率正比於 priority ** alpha，並回傳 importance-sampling 權重修正偏差，
+    beta 會在 beta_frames 次抽樣內從 beta_start 漸增到 1。
+    """
+
+    def __init__(self, capacity, state_size, alpha=0.6, beta_start=0.4, beta_frames=100000, epsilon=1e-6):
+        super().__init__(capacity, state_size)
+        self.tree = SumTree(capacity)
+        self.alpha = alpha
+        self.beta = beta_start
+        self.beta_increment = (1.0 - beta_start) / beta_frames
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+
+    def push(self, state, action, reward, next_state, done):
+        # 新經驗給目前最大的優先度，確保至少被抽到一次
+        index = super().push(state, action, reward, next_state, done)
+        self.tree.update([index], self.max_priority ** self.alpha)
+        return index
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        indices = super().push_batch(states, actions, rewards, next_states, dones)
+        self.tree.update(indices, np.full(len(indices), self.max_priority ** self.alpha))
+        return indices
+
+    def sample_indices(self, batch_size):
+        # 把總和切成 batch_size 段，每段各抽一個，分布較平均
+        total = self.tree.total
+        segment = total / batch_size
+        values = (np.arange(batch_size) + np.random.rand(batch_size)) * segment
+        values = np.minimum(values, np.nextafter(total, 0))
+        return np.minimum(self.tree.find(values), self.size - 1)
+
+    def sample(self, batch_size):
+        """回傳 (batch, indices, weights)"""
+        indices = self.sample_indices(batch_size)
+        probs = self.tree.get(indices) / self.tree.total
+        weights = (self.size * probs) ** (-self.beta)
+        weights = (weights / weights.max()).astype(np.float32)
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        return self.get(indices), indices, weights
+
+    def update_priorities(self, indices, td_errors):
+        priorities = np.abs(td_errors) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
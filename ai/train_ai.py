@@ -1,17 +1,22 @@
 import pygame
+import random
 import numpy as np
 import torch
 import os
 import time
 import sys
 import signal
-import json
 import csv
+from collections import deque
 from datetime import datetime
 
 # 添加專案根目錄到Python路徑
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from ai.env import PixelJumperEnv
+from ai.vec_env import make_vec_env
+from ai.actor_learner import ActorPool
+from ai.metrics_log import MetricsLog, import_training_data
+from ai.checkpoint import CheckpointWriter
 from ai.ai_model import GameAI
 from game.settings import *
 
@@ -21,25 +26,16 @@ model_dir = f"models/{REWARD_VERSION}"
 os.makedirs(model_dir, exist_ok=True)
 
 
-def save_training_data(episode, ai, episode_rewards, episode_steps, avg_reward, best_avg_reward, losses):
-    """儲存訓練數據"""
+def save_training_data(episode, ai, metrics, checkpoints, episode_rewards, episode_steps, avg_reward, best_avg_reward, losses, model_dir=model_dir):
+    """儲存模型與續訓資訊；每回合的紀錄已由 MetricsLog 逐筆附加，這裡只改寫表頭"""
     
-    # 儲存模型
-    torch.save(ai.model.state_dict(), f"{model_dir}/dqn_model_episode_{episode+1}.pth")
+    # 儲存模型（背景寫入）
+    checkpoints.save(ai.model.state_dict(), f"dqn_model_episode_{episode+1}.pth")
     
-    # 儲存訓練統計資訊
-    training_data = {
-        'episode': episode + 1,
-        'episode_rewards': episode_rewards,
-        'episode_steps': episode_steps,
-        "best_avg_reward": best_avg_reward,
-        'avg_reward': avg_reward,
-        'epsilon': ai.epsilon,
-        'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
-    }
-    
-    with open(f'{model_dir}/training_data.json', 'w') as f:
-        json.dump(training_data, f)
+    # 續訓資訊寫在訓練紀錄檔的表頭
+    metrics.update_header(saved_episodes=episode + 1, best_avg_reward=best_avg_reward, epsilon=ai.epsilon)
+    if not episode_rewards:
+        return
     
     # 儲存CSV格式的訓練數據
     csv_filename = f"{model_dir}/training_history.csv"
@@ -54,9 +50,9 @@ def save_training_data(episode, ai, episode_rewards, episode_steps, avg_reward,
                 'Avg_Reward', 'Avg_Steps', 'Avg_Loss', 'Timestamp'
             ])
         
-        # 計算平均步數
-        avg_steps = np.mean(episode_steps[-100:]) if len(episode_steps) >= 100 else np.mean(episode_steps)
-        avg_loss = np.mean(losses[-100:]) if len(losses) >= 100 else (np.mean(losses) if losses else 0)
+        # 計算平均步數（episode_steps / losses 只保留最近 100 筆）
+        avg_steps = np.mean(episode_steps)
+        avg_loss = np.mean(losses) if losses else 0
         
         # 寫入當前回合的數據
         writer.writerow([
@@ -70,57 +66,105 @@ def save_training_data(episode, ai, episode_rewards, episode_steps, avg_reward,
             datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         ])
 
-def train_ai():
+def train_ai(num_envs=1, vec_backend="subproc", memory_capacity=10000, prioritized=False,
+             episodes=50000, render=True, model_dir=model_dir,
+             fast=False, updates_per_step=1.5, eval_every=0, seed=None, eval_seed=0,
+             actors=0, sync_interval=100, max_lead_steps=5000, stats_interval=10.0,
+             keep_last=5, keep_best=3):
+    """
+    num_envs > 1 時改用向量環境，同時在多個環境收集經驗：
+    vec_backend="subproc" 為多進程 PixelJumperEnv，"numpy" 為 VectorPixelJumperEnv
+    memory_capacity: 經驗回放緩衝的容量
+    prioritized: 使用 sum-tree 優先經驗回放（依 TD error 抽樣）
+    episodes / render / model_dir: 訓練回合數、是否顯示畫面、模型與訓練數據的儲存目錄
+    fast: 快速訓練模式，不限幀率、訓練回合不渲染（畫面只出現在評估回合）
+    updates_per_step: 每個環境步（每筆經驗）進行幾次梯度更新，可為小數
+    eval_every: 每 n 個回合跑一次貪婪策略的評估回合（開啟 render 時顯示畫面），0 為不評估
+    seed: 固定 random / NumPy / torch 與訓練世界序列的種子，None 為不固定
+    eval_seed: 評估回合固定使用的世界種子，各次評估結果可直接比較
+    actors > 0 時改用 actor–learner 模式：actors 個進程各跑一個環境並把經驗寫進共享記憶體回放緩衝，
+    主進程只負責訓練（learner），每 sync_interval 次梯度更新發佈一次權重給 actor，
+    每 stats_interval 秒印出雙方的吞吐量；updates_per_step 仍決定梯度更新與環境步數的比例，
+    actor 最多領先 learner 的進度 max_lead_steps 步
+    keep_last / keep_best: 模型在背景執行緒寫入，dqn_model_episode_N.pth 只保留最新 keep_last 個、
+    best_model_ep*.pth 只保留平均獎勵最高的 keep_best 個（None 或 0 為全部保留）；
+    只計算這次訓練寫的檔案，model_dir 原本的檔案不會被刪
+    """
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+        torch.manual_seed(seed)
+
     # 檢查是否有GPU可用
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     print(f"使用設備: {device}")
     
-    # 初始化環境
-    env = PixelJumperEnv()
-    
+    os.makedirs(model_dir, exist_ok=True)
+
+    if actors > 0 and prioritized:
+        raise ValueError("actor–learner 模式的共享回放緩衝不支援優先經驗回放")
+
     # 初始化AI
-    ai = GameAI(device=device)
-    
+    ai = GameAI(device=device, memory_capacity=memory_capacity, prioritized=prioritized)
+
     best_avg_reward = -float("inf")
     
-    episode_rewards = []
-    episode_steps = []
-    losses = []
+    # 平均值只看最近 100 回合 / 100 次更新，完整紀錄在 metrics.bin
+    episode_rewards = deque(maxlen=100)
+    episode_steps = deque(maxlen=100)
+    losses = deque(maxlen=100)
     start_episode = 0    
 
-    
-    
-    if os.path.exists(f"{model_dir}/training_data.json"):
-        with open(f"{model_dir}/training_data.json", "r") as f:
-            data = json.load(f)
-            best_avg_reward = data.get("best_avg_reward", -float("inf"))
-            start_episode = data.get("episode", 0)
-            episode_rewards = data.get("episode_rewards", [])
-            episode_steps = data.get("episode_steps", [])
-            print(f"➡️ 從第 {start_episode} 回合繼續訓練")
+    metrics = MetricsLog(f"{model_dir}/metrics.bin")
+    if len(metrics) == 0 and os.path.exists(f"{model_dir}/training_data.json"):
+        # 舊版的 training_data.json 轉換一次
+        import_training_data(f"{model_dir}/training_data.json", metrics)
+    if metrics.saved_episodes > 0:
+        best_avg_reward = metrics.best_avg_reward
+        start_episode = metrics.saved_episodes
+        if not np.isnan(metrics.epsilon):
+            ai.epsilon = metrics.epsilon  # 接著原本的探索率，不從 1.0 重新探索
+        metrics.truncate_after(start_episode)  # 最後一次存模型之後的回合會重新訓練
+        recent = metrics.tail(100)
+        episode_rewards.extend(recent["reward"].tolist())
+        episode_steps.extend(recent["steps"].tolist())
+        print(f"➡️ 從第 {start_episode} 回合繼續訓練")
         
     
     # 訓練參數
     batch_size = 64
-    episodes = 50000
     max_steps = 1000
     target_update_frequency = 50
     render_frequency = 5
-    training_frequency = 2
     save_every_n_episodes  = 1000  # 每n步儲存一次模型
         
     model_path = f"{model_dir}/dqn_model_episode_{start_episode}.pth"
     if os.path.exists(model_path):
         ai.load_model(model_path)
         print(f"✅ 已載入模型參數：{model_path}")
+    checkpoints = CheckpointWriter(model_dir, keep_last=keep_last, keep_best=keep_best)
+
+    # 初始化環境（續訓時模型已載入，ActorPool 一開始發佈的就是載入的權重）
+    if actors > 0:
+        env = ActorPool(actors, ai, memory_capacity, seed=seed)
+        env.limit_steps(max_lead_steps if updates_per_step > 0 else None)
+        ai.memory = env.memory
+        print(f"actor–learner: {actors} 個 actor，每 {sync_interval} 次更新同步權重")
+    elif num_envs > 1:
+        env = make_vec_env(num_envs, vec_backend, seed=seed)
+        print(f"向量環境: {vec_backend} x {num_envs}")
+    else:
+        env = PixelJumperEnv()
     
     # 記錄訓練統計資訊
     start_time = time.time()
     
     def signal_handler(signum, frame):
         print("\n檢測到中斷信號，正在儲存訓練數據...")
-        avg_reward = np.mean(episode_rewards[-100:]) if len(episode_rewards) >= 100 else np.mean(episode_rewards)
-        save_training_data(current_episode, ai, episode_rewards, episode_steps, avg_reward, best_avg_reward, losses)
+        avg_reward = np.mean(episode_rewards)
+        save_training_data(current_episode, ai, metrics, checkpoints, episode_rewards, episode_steps, avg_reward, best_avg_reward, losses, model_dir)
+        metrics.close()
+        checkpoints.close()  # 等背景存檔寫完再離開
         print("訓練數據已儲存！")
         env.close()
         sys.exit(0)
@@ -129,64 +173,70 @@ def train_ai():
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
-    current_episode = start_episode
-    for episode in range(start_episode, episodes):
-        current_episode = episode
-        state = env.reset()
-        total_reward = 0
-        steps = 0
-        
-        while steps < max_steps:
-            # 選擇動作
-            action = ai.get_action(state)
-            
-            # 執行動作
-            next_state, reward, done, info = env.step(action)
-            
-            # 儲存經驗
-            ai.remember(state, action, reward, next_state, done)
-            
-            # 訓練
-            if steps % training_frequency == 0:
-                ai.train(batch_size)
-            
-            # 更新目標網路
-            if steps % target_update_frequency == 0:
-                ai.update_target_model()
-            
-            # 渲染
-            if steps % render_frequency == 0:
-                env.render()
-            
-            state = next_state
-            total_reward += reward
-            steps += 1
+    # 快速模式不限幀率，訓練回合也不渲染
+    clock = None if fast else pygame.time.Clock()
+    render_training = render and not fast
+    eval_env = None
+    update_credit = 0.0
+    episode_loss = [0.0, 0]  # 上一回合結束後累計的 loss 總和與次數
+
+    def learn(transitions):
+        """依 updates_per_step 累積額度，額度滿 1 就訓練一次；回傳這次訓練的次數"""
+        nonlocal update_credit
+        update_credit += updates_per_step * transitions
+        updates = 0
+        while update_credit >= 1:
+            update_credit -= 1
             loss = ai.train(batch_size)
             if loss is not None:
                 losses.append(loss)
-            
-            if done:
-                break
-            
-            # 控制幀率
-            pygame.time.Clock().tick(120)
-        
+                episode_loss[0] += loss
+                episode_loss[1] += 1
+                updates += 1
+        return updates
+
+    def evaluate(episode):
+        """以貪婪策略跑一個評估回合，不寫入經驗；開啟 render 時以正常速度顯示"""
+        nonlocal eval_env
+        if eval_env is None:
+            eval_env = PixelJumperEnv(seed=eval_seed)
+        eval_clock = pygame.time.Clock()
+        state = eval_env.reset()
+        total_reward = 0
+        done = False
+        while not done:
+            action = ai.get_action(state, force_exploit=True)
+            state, reward, done, info = eval_env.step(action)
+            total_reward += reward
+            if render:
+                eval_env.render()
+                eval_clock.tick(FPS)
+        print(f"🎯 評估回合（第 {episode + 1} 回合後）: 總獎勵 {total_reward:.2f}, 距離 {info['distance']}")
+
+    def finish_episode(episode, total_reward, steps):
+        """記錄一個回合的統計、定期存檔與更新最佳模型；回傳是否該提前結束"""
+        nonlocal best_avg_reward
+
         # 記錄統計資訊
         episode_rewards.append(total_reward)
         episode_steps.append(steps)
+        loss_sum, loss_count = episode_loss
+        metrics.append(episode + 1, total_reward, steps, ai.epsilon,
+                       loss_sum / loss_count if loss_count else float("nan"))
+        episode_loss[:] = [0.0, 0]
         
         if (episode + 1) % save_every_n_episodes  == 0:
-            avg_reward = np.mean(episode_rewards[-100:]) if len(episode_rewards) >= 100 else np.mean(episode_rewards)
-            save_training_data(episode, ai, episode_rewards, episode_steps, avg_reward, best_avg_reward, losses)
+            avg_reward = np.mean(episode_rewards)
+            save_training_data(episode, ai, metrics, checkpoints, episode_rewards, episode_steps, avg_reward, best_avg_reward, losses, model_dir)
         
         # 計算平均獎勵和步數
-        avg_reward = np.mean(episode_rewards[-100:]) if len(episode_rewards) >= 100 else np.mean(episode_rewards)
+        avg_reward = np.mean(episode_rewards)
         if avg_reward > best_avg_reward:
             best_avg_reward = avg_reward
-            torch.save(ai.model.state_dict(), f"{model_dir}/best_model.pth")
-            torch.save(ai.model.state_dict(), f"{model_dir}/best_model_ep{episode+1}_reward{avg_reward:.2f}.pth")
+            checkpoints.save(ai.model.state_dict(), "best_model.pth")
+            checkpoints.save(ai.model.state_dict(), f"best_model_ep{episode+1}_reward{avg_reward:.2f}.pth")
             print(f"✅ 新最佳模型! AvgReward = {avg_reward:.2f}，已儲存。")
-        avg_steps = np.mean(episode_steps[-100:]) if len(episode_steps) >= 100 else np.mean(episode_steps)
+        avg_steps = np.mean(episode_steps)
         
         # 計算訓練時間
         elapsed_time = time.time() - start_time
@@ -202,16 +252,192 @@ def train_ai():
               f"平均步數: {avg_steps:.1f}, "
               f"訓練速度: {episodes_per_hour:.1f}回合/小時")
         
+        if eval_every and (episode + 1) % eval_every == 0:
+            evaluate(episode)
+        
         # 如果平均獎勵足夠好，提前結束訓練
         if avg_reward > 500 and len(episode_rewards) >= 100:
             print("訓練完成!AI表現足夠好。")
-            break
+            return True
+        return False
+
+    current_episode = start_episode
+    if actors > 0:
+        # actor–learner：actor 在子進程持續收集經驗，這裡只訓練、發佈權重與記錄回合
+        next_episode = start_episode
+        finished = False
+        seen_steps = 0
+        updates = 0
+        last_sync = last_target = 0
+        last_stats_time = time.time()
+        last_stats_updates = last_stats_steps = 0
+        # 每輪最多消化約 sync_interval 次更新的經驗，中間仍會發佈權重與記錄回合
+        learn_chunk = max(1, int(sync_interval / updates_per_step)) if updates_per_step > 0 else None
+        while next_episode < episodes and not finished:
+            new_steps = env.env_steps - seen_steps
+            if learn_chunk is not None:
+                new_steps = min(new_steps, learn_chunk)
+            trained = learn(new_steps)
+            seen_steps += new_steps
+            updates += trained
+            if updates_per_step > 0:
+                env.limit_steps(seen_steps + max_lead_steps)
+
+            if updates - last_target >= target_update_frequency:
+                ai.update_target_model()
+                last_target = updates
+            if updates - last_sync >= sync_interval:
+                env.publish(ai)
+                last_sync = updates
+
+            for _, total_reward, steps, _ in env.poll_episodes():
+                current_episode = next_episode
+                next_episode += 1
+                finished = finish_episode(current_episode, total_reward, steps)
+                if finished or next_episode >= episodes:
+                    break
+
+            now = time.time()
+            if now - last_stats_time >= stats_interval:
+                stats = env.stats()
+                interval = now - last_stats_time
+                print(f"⚙️ actor: {(stats['actor_steps'] - last_stats_steps) / interval:.0f} 步/秒, "
+                      f"learner: {(updates - last_stats_updates) / interval:.0f} 次更新/秒, "
+                      f"權重版本: {stats['weight_version']}, 緩衝: {len(ai.memory)}")
+                last_stats_time = now
+                last_stats_steps = stats['actor_steps']
+                last_stats_updates = updates
+
+            if not trained:
+                time.sleep(0.001)  # 經驗還不夠訓練，讓出 CPU 給 actor
+    elif num_envs > 1:
+        # 向量環境：每個環境各自累計回合，done 時自動 reset
+        states = env.reset()
+        total_rewards = np.zeros(num_envs)
+        env_steps = np.zeros(num_envs, dtype=int)
+        vec_step = 0
+        next_episode = start_episode
+        finished = False
+        while next_episode < episodes and not finished:
+            actions = ai.get_actions(states)
+            next_states, rewards, dones, infos = env.step(actions)
+
+            # 儲存經驗（done 時 next_state 為結束前的觀察）
+            final_states = next_states.copy()
+            for i in np.nonzero(dones)[0]:
+                final_states[i] = infos[i]['terminal_observation']
+            ai.remember_batch(states, actions, rewards, final_states, dones)
+
+            # 訓練
+            learn(num_envs)
+
+            # 更新目標網路
+            if vec_step % target_update_frequency == 0:
+                ai.update_target_model()
+
+            total_rewards += rewards
+            env_steps += 1
+            vec_step += 1
+            states = next_states
+
+            for i in np.nonzero(dones)[0]:
+                current_episode = next_episode
+                next_episode += 1
+                finished = finish_episode(current_episode, float(total_rewards[i]), int(env_steps[i]))
+                total_rewards[i] = 0
+                env_steps[i] = 0
+                if finished or next_episode >= episodes:
+                    break
+    else:
+        for episode in range(start_episode, episodes):
+            current_episode = episode
+            state = env.reset()
+            total_reward = 0
+            steps = 0
+            
+            while steps < max_steps:
+                # 選擇動作
+                action = ai.get_action(state)
+                
+                # 執行動作
+                next_state, reward, done, info = env.step(action)
+                
+                # 儲存經驗
+                ai.remember(state, action, reward, next_state, done)
+                
+                # 訓練
+                learn(1)
+                
+                # 更新目標網路
+                if steps % target_update_frequency == 0:
+                    ai.update_target_model()
+                
+                # 渲染
+                if render_training and steps % render_frequency == 0:
+                    env.render()
+                
+                state = next_state
+                total_reward += reward
+                steps += 1
+                
+                if done:
+                    break
+                
+                # 控制幀率
+                if clock is not None:
+                    clock.tick(120)
+            
+            if finish_episode(episode, total_reward, steps):
+                break
     
     # 儲存最終模型和訓練數據
-    avg_reward = np.mean(episode_rewards[-100:]) if len(episode_rewards) >= 100 else np.mean(episode_rewards)
-    save_training_data(current_episode, ai, episode_rewards, episode_steps, avg_reward, best_avg_reward, losses)
-    torch.save(ai.model.state_dict(), f"{model_dir}/dqn_model_final.pth")
+    avg_reward = np.mean(episode_rewards)
+    save_training_data(current_episode, ai, metrics, checkpoints, episode_rewards, episode_steps, avg_reward, best_avg_reward, losses, model_dir)
+    metrics.close()
+    checkpoints.save(ai.model.state_dict(), "dqn_model_final.pth")
+    checkpoints.close()
+    if eval_env is not None:
+        eval_env.close()
     env.close()
 
 if __name__ == "__main__":
-    train_ai() 
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description='訓練 Pixel Jumper DQN')
+    parser.add_argument('--num-envs', type=int, default=1,
+                        help='同時收集經驗的環境數量（>1 時使用向量環境）')
+    parser.add_argument('--vec-backend', choices=['subproc', 'numpy'], default='subproc',
+                        help='向量環境實作：subproc（多進程）或 numpy（向量化物理）')
+    parser.add_argument('--memory-capacity', type=int, default=10000,
+                        help='經驗回放緩衝的容量')
+    parser.add_argument('--prioritized', action='store_true',
+                        help='使用優先經驗回放（Prioritized Experience Replay）')
+    parser.add_argument('--episodes', type=int, default=50000,
+                        help='訓練回合數')
+    parser.add_argument('--no-render', action='store_true',
+                        help='訓練時不顯示畫面')
+    parser.add_argument('--fast', action='store_true',
+                        help='快速訓練：不限幀率，只在評估回合顯示畫面')
+    parser.add_argument('--updates-per-step', type=float, default=1.5,
+                        help='每個環境步的梯度更新次數（update-to-data ratio）')
+    parser.add_argument('--eval-every', type=int, default=0,
+                        help='每 n 回合跑一次評估回合，0 為不評估')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='亂數種子（訓練世界與網路初始化可重現）')
+    parser.add_argument('--eval-seed', type=int, default=0,
+                        help='評估回合使用的世界種子')
+    parser.add_argument('--actors', type=int, default=0,
+                        help='actor–learner 模式的 actor 進程數，0 為單進程訓練')
+    parser.add_argument('--sync-interval', type=int, default=100,
+                        help='actor–learner 模式每幾次梯度更新發佈一次權重')
+    parser.add_argument('--keep-last', type=int, default=5,
+                        help='保留最新幾個 dqn_model_episode_N.pth，0 為全部保留')
+    parser.add_argument('--keep-best', type=int, default=3,
+                        help='保留平均獎勵最高的幾個 best_model_ep*.pth，0 為全部保留')
+    args = parser.parse_args()
+    train_ai(num_envs=args.num_envs, vec_backend=args.vec_backend,
+             memory_capacity=args.memory_capacity, prioritized=args.prioritized,
+             episodes=args.episodes, render=not args.no_render, model_dir=model_dir,
+             fast=args.fast, updates_per_step=args.updates_per_step, eval_every=args.eval_every,
+             seed=args.seed, eval_seed=args.eval_seed,
+             actors=args.actors, sync_interval=args.sync_interval,
+             keep_last=args.keep_last, keep_best=args.keep_best) 
\ No newline at end of file
@@ -0,0 +1,394 @@
+import numpy as np
+import multiprocessing as mp
+import random
+import signal
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gym import spaces
+from game.settings import (
+    WIDTH, HEIGHT, TILE_SIZE, INVINCIBLE_FRAMES,
+    CHUNK_WIDTH, CHUNKS_BEHIND, CHUNKS_AHEAD,
+)
+from game.level import EMPTY, TILE, OBSTACLE, ROWS, generate_world_chunk_grid, new_world_seed
+
+PLAYER_W, PLAYER_H = 30, 40
+MAX_HEALTH = 3
+MAX_JUMP_COUNT = 2
+MAX_STEPS = 1000
+
+
+class VectorPixelJumperEnv:
+    """
+    N 個世界同步前進的向量化環境。
+    玩家狀態與地形佔據格都存成 NumPy 陣列，一次 step 用向量運算推進全部世界，
+    物理、觀察與獎勵與 Player.step / PixelJumperEnv 一致。
+    每個世界只保留滑動視窗內的區塊（環狀緩衝），done 的世界會自動 reset。
+    seed 決定之後各世界的世界種子序列；None 時取自全域 random。
+    """
+
+    def __init__(self, num_envs, seed=None):
+        self.num_envs = num_envs
+        self.rng = random.Random(seed) if seed is not None else random
+        self.action_space = spaces.Discrete(4)
+        self.observation_space = self.observation_space_for()
+
+        # 環狀緩衝要裝得下滑動視窗內所有存活區塊
+        view_chunks = -(-(WIDTH // TILE_SIZE) // CHUNK_WIDTH)
+        self.window_chunks = CHUNKS_BEHIND + CHUNKS_AHEAD + view_chunks + 2
+        self.window_cols = self.window_chunks * CHUNK_WIDTH
+
+        n = num_envs
+        self.grid = np.zeros((n, ROWS, self.window_cols), dtype=np.uint8)
+        self.slot_chunk = np.full((n, self.window_chunks), -1, dtype=np.int64)  # 每個槽目前放第幾個區塊
+        self.generated_chunks = np.zeros(n, dtype=np.int64)
+        self.first_chunk = np.zeros(n, dtype=np.int64)  # 最舊的存活區塊
+        self.world_seed = np.zeros(n, dtype=np.int64)
+
+        self.x = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+        self.vel_y = np.zeros(n, dtype=np.int64)
+        self.jump_count = np.zeros(n, dtype=np.int64)
+        self.health = np.zeros(n, dtype=np.int64)
+        self.on_ground = np.zeros(n, dtype=bool)
+        self.invincible = np.zeros(n, dtype=bool)
+        self.invincible_timer = np.zeros(n, dtype=np.int64)
+        self.frame = np.zeros(n, dtype=np.int64)
+        self.air_time = np.zeros(n, dtype=np.int64)
+        self.max_distance = np.zeros(n, dtype=np.int64)
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.last_x = np.zeros(n, dtype=np.int64)
+        self.prev_health = np.zeros(n, dtype=np.int64)
+
+        self._slot_offsets = np.arange(self.window_cols) % CHUNK_WIDTH
+        self._slot_index = np.arange(self.window_cols) // CHUNK_WIDTH
+        self._row_tops = np.arange(ROWS) * TILE_SIZE
+
+    @staticmethod
+    def observation_space_for():
+        """單一世界的觀察空間（與 PixelJumperEnv 相同的 8 個特徵）"""
+        return spaces.Box(
+            low=np.array([0, 0, -1, 0, 0, 0, 0, 0], dtype=np.float32),
+            high=np.array([1, 1, 1, 1, 1, 1, 1, 1], dtype=np.float32),
+            dtype=np.float32
+        )
+
+    # --- 地形 ---
+    def _spawn_chunk(self, i):
+        """替第 i 個世界生成下一個區塊，放進環狀緩衝"""
+        index = int(self.generated_chunks[i])
+        grid = generate_world_chunk_grid(int(self.world_seed[i]), index)
+
+        slot = index % self.window_chunks
+        # 槽裡還有存活區塊時強制回收（視窗大小足夠時不會發生）
+        if self.slot_chunk[i, slot] >= self.first_chunk[i]:
+            self.first_chunk[i] = self.slot_chunk[i, slot] + 1
+        self.grid[i, :, slot * CHUNK_WIDTH:(slot + 1) * CHUNK_WIDTH] = grid
+        self.slot_chunk[i, slot] = index
+        self.generated_chunks[i] += 1
+
+    def _update_chunks(self):
+        """與 Simulation._update_chunks 相同的滑動視窗規則"""
+        scroll = np.minimum(0, -(self.x - WIDTH // 2))
+        view_left = -scroll // TILE_SIZE
+        view_right = (-scroll + WIDTH) // TILE_SIZE
+
+        limit = view_right + CHUNKS_AHEAD * CHUNK_WIDTH
+        for i in np.nonzero(self.generated_chunks * CHUNK_WIDTH <= limit)[0]:
+            while self.generated_chunks[i] * CHUNK_WIDTH <= limit[i]:
+                self._spawn_chunk(i)
+
+        keep_from = view_left - CHUNKS_BEHIND * CHUNK_WIDTH
+        first = np.maximum(self.first_chunk, keep_from // CHUNK_WIDTH)
+        self.first_chunk = np.minimum(first, self.generated_chunks - 1)
+
+        # 已回收的區域不能再走回去（與 Simulation 相同，玩家至少離左緣半個畫面）
+        left_edge = self.first_chunk * CHUNK_WIDTH * TILE_SIZE
+        self.x = np.maximum(self.x, np.where(left_edge > 0, left_edge + WIDTH // 2, 0))
+
+    def _live_columns(self):
+        """每個槽對應的世界欄位，以及該槽是否屬於存活區塊"""
+        chunk = self.slot_chunk[:, self._slot_index]
+        cols = chunk * CHUNK_WIDTH + self._slot_offsets
+        live = (chunk >= self.first_chunk[:, None]) & (chunk >= 0)
+        return cols, live
+
+    def _cells(self, kind):
+        """
+        玩家矩形覆蓋的格子（最多 2x2）是否為 kind。
+        回傳 rows, cols (N, 2) 與 hit (N, 2, 2)
+        """
+        rows = np.stack([self.y // TILE_SIZE, (self.y + PLAYER_H - 1) // TILE_SIZE], axis=1)
+        cols = np.stack([self.x // TILE_SIZE, (self.x + PLAYER_W - 1) // TILE_SIZE], axis=1)
+
+        chunk = cols // CHUNK_WIDTH
+        slot = chunk % self.window_chunks
+        env = np.arange(self.num_envs)[:, None]
+        col_live = (self.slot_chunk[env, slot] == chunk) & (chunk >= self.first_chunk[:, None])
+        row_ok = (rows >= 0) & (rows < ROWS)
+
+        grid_cols = slot * CHUNK_WIDTH + cols % CHUNK_WIDTH
+        cell = self.grid[env[:, :, None], np.clip(rows, 0, ROWS - 1)[:, :, None], grid_cols[:, None, :]]
+        hit = (cell == kind) & row_ok[:, :, None] & col_live[:, None, :]
+        return rows, cols, hit
+
+    # --- 物理（對應 Player.step / Player.collision） ---
+    def _collide_x(self, dx):
+        _, cols, hit = self._cells(TILE)
+        hit_col = hit.any(axis=1)  # (N, 2)
+        any_hit = hit_col.any(axis=1)
+
+        right = any_hit & (dx > 0)
+        left_col = np.where(hit_col[:, 0], cols[:, 0], cols[:, 1])
+        self.x = np.where(right, left_col * TILE_SIZE - PLAYER_W, self.x)
+
+        left = any_hit & (dx < 0)
+        right_col = np.where(hit_col[:, 1], cols[:, 1], cols[:, 0])
+        self.x = np.where(left, (right_col + 1) * TILE_SIZE, self.x)
+
+    def _collide_y(self, dy):
+        rows, _, hit = self._cells(TILE)
+        hit_row = hit.any(axis=2)  # (N, 2)
+        any_hit = hit_row.any(axis=1)
+
+        down = any_hit & (dy > 0)
+        top_row = np.where(hit_row[:, 0], rows[:, 0], rows[:, 1])
+        self.y = np.where(down, top_row * TILE_SIZE - PLAYER_H, self.y)
+        self.on_ground |= down
+        self.jump_count = np.where(down, 0, self.jump_count)
+
+        up = any_hit & (dy < 0)
+        bottom_row = np.where(hit_row[:, 1], rows[:, 1], rows[:, 0])
+        self.y = np.where(up, (bottom_row + 1) * TILE_SIZE, self.y)
+
+        self.vel_y = np.where(down | up, 0, self.vel_y)
+
+    def _physics(self, actions):
+        dx = np.where(actions == 1, -5, np.where(actions == 2, 5, 0))
+
+        jump = (actions == 3) & (self.jump_count < MAX_JUMP_COUNT)
+        self.vel_y = np.where(jump, -15, self.vel_y)
+        self.jump_count = self.jump_count + jump
+
+        self.vel_y = np.minimum(self.vel_y + 1, 10)  # gravity
+
+        self.x = self.x + dx
+        self._collide_x(dx)
+        dy = self.vel_y.copy()
+        self.y = self.y + dy
+        self._collide_y(dy)
+
+        # 掉出畫面：扣血並從上方重生
+        fell = self.y > HEIGHT
+        self.health -= fell
+        self.y = np.where(fell, -100, self.y)
+        self.vel_y = np.where(fell, 0, self.vel_y)
+
+        # 碰撞障礙物（加上無敵時間）
+        _, _, hit = self._cells(OBSTACLE)
+        hurt = hit.any(axis=(1, 2)) & ~self.invincible
+        self.health -= hurt
+        self.invincible |= hurt
+        self.invincible_timer = np.where(hurt, self.frame, self.invincible_timer)
+        self.invincible &= ~(self.frame - self.invincible_timer > INVINCIBLE_FRAMES)
+
+        self.frame += 1
+
+    # --- 觀察與獎勵（對應 PixelJumperEnv._get_obs / _get_reward） ---
+    def _nearest_below(self, kind):
+        """玩家下方最近的 kind 格與玩家中心的水平距離，沒有則為 inf"""
+        cols, live = self._live_columns()
+        bottom = self.y + PLAYER_H
+        below = self._row_tops[None, :] > bottom[:, None]  # (N, ROWS)
+        present = ((self.grid == kind) & below[:, :, None]).any(axis=1) & live
+        dist = np.abs(cols * TILE_SIZE + TILE_SIZE // 2 - (self.x + PLAYER_W // 2)[:, None])
+        return np.where(present, dist, np.inf).min(axis=1)
+
+    def _get_obs(self, nearest_platform, nearest_obstacle):
+        return np.stack([
+            self.x / WIDTH,
+            self.y / HEIGHT,
+            self.vel_y / 10.0,
+            self.on_ground.astype(np.float64),
+            self.jump_count / MAX_JUMP_COUNT,
+            np.where(np.isinf(nearest_platform), 1.0, nearest_platform / WIDTH),
+            np.where(np.isinf(nearest_obstacle), 1.0, nearest_obstacle / WIDTH),
+            self.health / MAX_HEALTH,
+        ], axis=1).astype(np.float32)
+
+    def _get_reward(self, nearest_platform, nearest_obstacle, game_over):
+        reward = np.zeros(self.num_envs)
+
+        delta_x = self.x - self.last_x
+        reward += np.where(delta_x > 0, delta_x * 0.1, 0.0)
+        self.last_x = self.x.copy()
+
+        reward -= np.where(~self.on_ground & (self.air_time > 30), 0.05, 0.0)
+        reward -= np.where(delta_x < 0, 0.02, 0.0)
+        reward += np.where(nearest_platform < 50, 0.02, 0.0)
+        reward -= np.where(self.prev_health > self.health, 0.2, 0.0)
+        self.prev_health = self.health.copy()
+        reward += np.where(nearest_obstacle < 50, 0.05, 0.0)
+
+        reward = np.where(game_over, -10.0, reward)
+        reward += 0.01
+        return np.clip(reward, -1, 1).astype(np.float32)
+
+    def _observe(self):
+        return self._get_obs(self._nearest_below(TILE), self._nearest_below(OBSTACLE))
+
+    # --- gym 風格介面 ---
+    def _reset_envs(self, indices):
+        for i in indices:
+            self.grid[i] = EMPTY
+            self.slot_chunk[i] = -1
+            self.generated_chunks[i] = 0
+            self.first_chunk[i] = 0
+            self.world_seed[i] = new_world_seed(self.rng)
+            self._spawn_chunk(i)
+        self.x[indices] = 100
+        self.y[indices] = 100
+        self.vel_y[indices] = 0
+        self.jump_count[indices] = 0
+        self.health[indices] = MAX_HEALTH
+        self.on_ground[indices] = False
+        self.invincible[indices] = False
+        self.invincible_timer[indices] = 0
+        self.frame[indices] = 0
+        self.air_time[indices] = 0
+        self.max_distance[indices] = 0
+        self.steps[indices] = 0
+        self.last_x[indices] = 100
+        self.prev_health[indices] = MAX_HEALTH
+
+    def reset(self):
+        self._reset_envs(np.arange(self.num_envs))
+        return self._observe()
+
+    def step(self, actions):
+        """
+        actions: (N,) 動作編號
+        回傳 obs (N, 8), rewards (N,), dones (N,), infos（list of dict）
+        done 的世界會自動 reset，結束前的觀察放在 info['terminal_observation']
+        """
+        actions = np.asarray(actions)
+        self._physics(actions)
+        self._update_chunks()
+
+        self.max_distance = np.maximum(self.max_distance, self.x // TILE_SIZE)
+        game_over = (self.y > HEIGHT) | (self.health <= 0)
+        self.air_time = np.where(self.on_ground, 0, self.air_time + 1)
+
+        nearest_platform = self._nearest_below(TILE)
+        nearest_obstacle = self._nearest_below(OBSTACLE)
+        obs = self._get_obs(nearest_platform, nearest_obstacle)
+        rewards = self._get_reward(nearest_platform, nearest_obstacle, game_over)
+        dones = game_over | (self.steps > MAX_STEPS)
+        self.steps += 1
+
+        infos = [{'distance': int(self.max_distance[i]), 'health': int(self.health[i])}
+                 for i in range(self.num_envs)]
+
+        done_idx = np.nonzero(dones)[0]
+        if len(done_idx):
+            for i in done_idx:
+                infos[i]['terminal_observation'] = obs[i].copy()
+            self._reset_envs(done_idx)
+            obs[done_idx] = self._observe()[done_idx]
+
+        return obs, rewards, dones, infos
+
+    def close(self):
+        pass
+
+
+# --- 多進程版本 ---
+def _subproc_worker(remote, parent_remote, seed):
+    """子進程：持有一個 PixelJumperEnv，依指令 step / reset"""
+    parent_remote.close()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # 中斷由主進程處理，再透過 close 結束
+    random.seed(seed)  # fork 出來的進程共用亂數狀態，要各自重新播種
+    from ai.env import PixelJumperEnv
+    env = PixelJumperEnv()
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == 'step':
+                obs, reward, done, info = env.step(data)
+                if done:
+                    info['terminal_observation'] = obs
+                    obs = env.reset()
+                remote.send((obs, reward, done, info))
+            elif cmd == 'reset':
+                remote.send(env.reset())
+            elif cmd == 'close':
+                break
+    except EOFError:
+        pass  # 主進程已結束
+    finally:
+        env.close()
+        remote.close()
+
+
+class SubprocVecEnv:
+    """
+    在 K 個子進程裡各跑一個 PixelJumperEnv，透過 Pipe 批次 step / reset。
+    介面與 VectorPixelJumperEnv 相同：done 的環境會自動 reset，
+    結束前的觀察放在 info['terminal_observation']。
+    """
+
+    def __init__(self, num_envs, seed=None, start_method=None):
+        self.num_envs = num_envs
+        self.action_space = spaces.Discrete(4)
+        self.observation_space = VectorPixelJumperEnv.observation_space_for()
+
+        if seed is None:
+            seed = random.randrange(2 ** 31)
+        ctx = mp.get_context(start_method)
+        self.remotes, work_remotes = zip(*[ctx.Pipe() for _ in range(num_envs)])
+        self.processes = []
+        for rank, (work_remote, remote) in enumerate(zip(work_remotes, self.remotes)):
+            process = ctx.Process(target=_subproc_worker, args=(work_remote, remote, seed + rank), daemon=True)
+            process.start()
+            work_remote.close()
+            self.processes.append(process)
+        self.closed = False
+
+    def reset(self):
+        for remote in self.remotes:
+            remote.send(('reset', None))
+        return np.stack([remote.recv() for remote in self.remotes])
+
+    def step(self, actions):
+        for remote, action in zip(self.remotes, actions):
+            remote.send(('step', int(action)))
+        results = [remote.recv() for remote in self.remotes]
+        obs, rewards, dones, infos = zip(*results)
+        return (np.stack(obs),
+                np.array(rewards, dtype=np.float32),
+                np.array(dones, dtype=bool),
+                list(infos))
+
+    def close(self):
+        if self.closed:
+            return
+        for remote in self.remotes:
+            try:
+                remote.send(('close', None))
+            except (BrokenPipeError, EOFError):
+                pass
+        for process in self.processes:
+            process.join()
+        self.closed = True
+
+
+def make_vec_env(num_envs, backend="subproc", seed=None):
+    """依 backend 建立向量環境：subproc（多進程）或 numpy（VectorPixelJumperEnv）"""
+    if backend == "subproc":
+        return SubprocVecEnv(num_envs, seed=seed)
+    if backend == "numpy":
+        return VectorPixelJumperEnv(num_envs, seed=seed)
+    raise ValueError(f"未知的向量環境 backend: {backend}")
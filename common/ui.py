@@ -1,21 +1,50 @@
 import pygame
+from collections import OrderedDict
 from game.settings import *
-import os
+from game import resources
 
 
-def draw_text(text, x, y, color=WHITE, font=font_medium):
-    img = font.render(text, True, color)
+# --- 文字快取 ---
+# 同樣的 (文字, 字型, 顏色, 反鋸齒) 只 render 一次，選單與 HUD 每幀直接 blit。
+# 以 LRU 淘汰，數量上限 TEXT_CACHE_SIZE，避免不斷變動的文字（例如距離）讓快取無限成長。
+TEXT_CACHE_SIZE = 256
+_text_cache = OrderedDict()
+text_cache_stats = {"hits": 0, "misses": 0}
+
+
+def render_text(text, font, color, antialias=True):
+    key = (text, font, tuple(color), antialias)
+    img = _text_cache.get(key)
+    if img is not None:
+        _text_cache.move_to_end(key)
+        text_cache_stats["hits"] += 1
+        return img
+
+    text_cache_stats["misses"] += 1
+    img = font.render(text, antialias, color)
+    _text_cache[key] = img
+    if len(_text_cache) > TEXT_CACHE_SIZE:
+        _text_cache.popitem(last=False)
+    return img
+
+
+def clear_text_cache():
+    _text_cache.clear()
+
+
+def draw_text(text, x, y, color=WHITE, font=None):
+    img = render_text(text, font or resources.font_medium, color)
     screen = pygame.display.get_surface()
     screen.blit(img, (x, y))
 
-def draw_centered_text(text, y, color=WHITE, font=font_medium):
-    img = font.render(text, True, color)
+def draw_centered_text(text, y, color=WHITE, font=None):
+    img = render_text(text, font or resources.font_medium, color)
     x = WIDTH // 2 - img.get_width() // 2
     screen = pygame.display.get_surface()
     screen.blit(img, (x, y))
     
-def draw_text_left(text, x, y, color=WHITE, font=font_medium):
-    img = font.render(text, True, color)
+def draw_text_left(text, x, y, color=WHITE, font=None):
+    img = render_text(text, font or resources.font_medium, color)
     screen = pygame.display.get_surface()
     screen.blit(img, (x, y))
     return img.get_width(), img.get_height() 
@@ -37,9 +66,9 @@ def draw_key_highlight_line(full_text, key, y, base_color, key_color, font):
     before, after = parts[0], parts[1] if len(parts) > 1 else ""
 
     # 渲染各段
-    img1 = font.render(before, True, base_color)
-    img2 = font.render(key, True, key_color)
-    img3 = font.render(after, True, base_color)
+    img1 = render_text(before, font, base_color)
+    img2 = render_text(key, font, key_color)
+    img3 = render_text(after, font, base_color)
 
     # 計算置中 X 座標
     total_width = img1.get_width() + img2.get_width() + img3.get_width()
@@ -51,72 +80,99 @@ def draw_key_highlight_line(full_text, key, y, base_color, key_color, font):
     screen.blit(img3, (x + img1.get_width() + img2.get_width(), y))
 
 
-def show_help_screen():
+# --- 事件驅動的畫面迴圈 ---
+# 選單畫面不會自己動，只在收到輸入（或視窗需要重畫）時才重畫，
+# 閒置時阻塞在 pygame.event.wait，不再空轉吃滿一個核心。
+MENU_FPS = 30  # 連續輸入（例如按住鍵、拖曳視窗）時的重畫上限
+
+
+def run_screen(draw, handle_event, max_fps=MENU_FPS):
+    """
+    執行一個選單畫面直到 handle_event 回傳非 None 的值，並回傳該值。
+    draw(screen): 畫出整個畫面（不必 flip）
+    handle_event(event): 處理單一事件；回傳 None 表示留在此畫面
+    """
     screen = pygame.display.get_surface()
+    clock = pygame.time.Clock()
+    dirty = True
     while True:
+        if dirty:
+            draw(screen)
+            pygame.display.flip()
+            dirty = False
+            clock.tick(max_fps)
+
+        # 沒有事件就睡著，有事件時一次處理完佇列裡所有事件再重畫
+        events = [pygame.event.wait()] + pygame.event.get()
+        for event in events:
+            if event.type == pygame.QUIT:
+                pygame.quit(); exit()
+            if event.type == pygame.MOUSEMOTION:
+                continue  # 畫面不跟滑鼠互動，不需重畫
+            dirty = True
+            result = handle_event(event)
+            if result is not None:
+                return result
+
+
+def show_help_screen():
+    def draw(screen):
         x = 40
         screen.fill((20, 20, 20))
-        draw_text_left("- HOW TO PLAY", x, 80, (255, 255, 0), font_large)
-        draw_text_left("- ← / → to move", x, 160, WHITE, font_medium)
-        draw_text_left("- Space to jump (double jump supported)", x, 200, WHITE, font_medium)
-        draw_text_left("- Avoid falling off or hitting obstacles", x, 240, WHITE, font_medium)
-        draw_text_left("- You have 3 HP. You lose 1 if hit or fall.", x, 280, WHITE, font_medium)
-        draw_text_left("- ESC to pause / Q to quit while paused", x, 320, WHITE, font_medium)
-        draw_text_left("- Press B to go back", x, 450, LIGHT_GRAY, font_small)
+        draw_text_left("- HOW TO PLAY", x, 80, (255, 255, 0), resources.font_large)
+        draw_text_left("- ← / → to move", x, 160, WHITE, resources.font_medium)
+        draw_text_left("- Space to jump (double jump supported)", x, 200, WHITE, resources.font_medium)
+        draw_text_left("- Avoid falling off or hitting obstacles", x, 240, WHITE, resources.font_medium)
+        draw_text_left("- You have 3 HP. You lose 1 if hit or fall.", x, 280, WHITE, resources.font_medium)
+        draw_text_left("- ESC to pause / Q to quit while paused", x, 320, WHITE, resources.font_medium)
+        draw_text_left("- Press B to go back", x, 450, LIGHT_GRAY, resources.font_small)
 
-        pygame.display.flip()
+    def handle_event(event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_b:
+            return True
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit(); exit()
-            elif event.type == pygame.KEYDOWN and event.key == pygame.K_b:
-                return
+    run_screen(draw, handle_event)
 
 def show_about_screen():
-    screen = pygame.display.get_surface()
-    while True:
+    def draw(screen):
         screen.fill((20, 20, 20))
         x = 40
-        draw_centered_text("ABOUT / CREDITS", 60, (255, 255, 0), font_large)
-        draw_centered_text("Game: Pixel Jumper", 140, WHITE, font_medium)
-        draw_centered_text("Created by: Kaimin Liao", 180, WHITE, font_medium)
+        draw_centered_text("ABOUT / CREDITS", 60, (255, 255, 0), resources.font_large)
+        draw_centered_text("Game: Pixel Jumper", 140, WHITE, resources.font_medium)
+        draw_centered_text("Created by: Kaimin Liao", 180, WHITE, resources.font_medium)
 
-        draw_text_left("Music from uǝɥM, Juhani Junkala & Matthew Pablo", x, 240, LIGHT_GRAY, font_small)
-        draw_text_left("Licensed under CC BY 4.0",x,  270, LIGHT_GRAY, font_small)
-        draw_text_left("- https://opengameart.org", x, 300, LIGHT_GRAY, font_small)
-        draw_text_left("- https://www.bandlab.com", x,  330, LIGHT_GRAY, font_small)
+        draw_text_left("Music from uǝɥM, Juhani Junkala & Matthew Pablo", x, 240, LIGHT_GRAY, resources.font_small)
+        draw_text_left("Licensed under CC BY 4.0",x,  270, LIGHT_GRAY, resources.font_small)
+        draw_text_left("- https://opengameart.org", x, 300, LIGHT_GRAY, resources.font_small)
+        draw_text_left("- https://www.bandlab.com", x,  330, LIGHT_GRAY, resources.font_small)
 
-        draw_centered_text("Press B to go back", 460, NORMAL_GRAY, font_small)
+        draw_centered_text("Press B to go back", 460, NORMAL_GRAY, resources.font_small)
 
-        pygame.display.flip()
+    def handle_event(event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_b:
+            return True
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit(); exit()
-            elif event.type == pygame.KEYDOWN and event.key == pygame.K_b:
-                return
+    run_screen(draw, handle_event)
 
 
 def show_main_menu():
-    screen = pygame.display.get_surface()
-    pygame.mixer.music.load(os.path.join(MUSIC_PATH, "CDMIxVintage.mp3"))
-    pygame.mixer.music.play(-1)  # 無限循環播放
-    
-    while True:
+    resources.play_music("CDMIxVintage.mp3")  # 無限循環播放
+
+    def draw(screen):
         screen.fill((30, 30, 30))
 
         # 🎮 標題
-        draw_centered_text("Pixel Jumper", 80, WHITE, font_large)
+        draw_centered_text("Pixel Jumper", 80, WHITE, resources.font_large)
 
         # ▶️ 主功能選項
-        draw_key_highlight_line("Press ENTER to Start", "ENTER", 180, LIGHT_GRAY, KEY_HIGHLIGHT, font_medium)
+        draw_key_highlight_line("Press ENTER to Start", "ENTER", 180, LIGHT_GRAY, KEY_HIGHLIGHT, resources.font_medium)
         draw_key_highlight_line(
             "Press H for How to Play",
             "H",
             230,
             NORMAL_GRAY,
             KEY_HIGHLIGHT,
-            font_small
+            resources.font_small
         )
         draw_key_highlight_line(
             "Press C for Credits",  
@@ -124,16 +180,16 @@ def show_main_menu():
             270,     
             NORMAL_GRAY,            
             (255, 180, 100),        
-            font_small              
+            resources.font_small              
         )
 
-        draw_key_highlight_line("Press ESC to Exit", "ESC", 330, NORMAL_GRAY, (100, 255, 200), font_small)
+        draw_key_highlight_line("Press ESC to Exit", "ESC", 330, NORMAL_GRAY, (100, 255, 200), resources.font_small)
 
 
         # 左下角 How to Play 小標題
         text_x = 30
         text_y = HEIGHT - 150
-        title_width, title_height = draw_text_left("How to Play (Simple)", text_x, text_y, (200, 200, 200), font_medium)
+        title_width, title_height = draw_text_left("How to Play (Simple)", text_x, text_y, (200, 200, 200), resources.font_medium)
 
         # 加底線
         pygame.draw.line(
@@ -144,51 +200,52 @@ def show_main_menu():
             2,
         )
         # 左下角操作說明（靠左對齊）
-        draw_text_left("← / → to move", text_x, text_y + 40, LIGHT_GRAY, font_small)
-        draw_text_left("Space to jump (double jump)", text_x, text_y + 70, LIGHT_GRAY, font_small)
-        draw_text_left("ESC to pause | Q to quit", text_x, text_y + 100, LIGHT_GRAY, font_small)
-
-        
-        pygame.display.flip()
-        for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    pygame.quit()
-                    exit()
-                if event.key == pygame.K_h:
-                    show_help_screen()
-                if event.key == pygame.K_c:
-                    show_about_screen()
-                if  event.key == pygame.K_RETURN:
-                    return
+        draw_text_left("← / → to move", text_x, text_y + 40, LIGHT_GRAY, resources.font_small)
+        draw_text_left("Space to jump (double jump)", text_x, text_y + 70, LIGHT_GRAY, resources.font_small)
+        draw_text_left("ESC to pause | Q to quit", text_x, text_y + 100, LIGHT_GRAY, resources.font_small)
+
+    def handle_event(event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                pygame.quit()
+                exit()
+            # 子畫面返回後 run_screen 會重畫主選單
+            if event.key == pygame.K_h:
+                show_help_screen()
+            if event.key == pygame.K_c:
+                show_about_screen()
+            if  event.key == pygame.K_RETURN:
+                return True
+
+    run_screen(draw, handle_event)
 
 
 def show_game_over(distance, total_time, highscores):
-    screen = pygame.display.get_surface()
-    pygame.mixer.music.load(os.path.join(MUSIC_PATH, "Woodland Fantasy.mp3"))    
-    pygame.mixer.music.play(-1)  # 可選用 -1 代表無限迴圈，或 0 播一次
-    while True:
+    resources.play_music("Woodland Fantasy.mp3")  # 可選用 loops=0 只播一次
+
+    def draw(screen):
         screen.fill((20, 20, 20))
-        draw_centered_text("Game Over", 100, (255, 100, 100), font_large)
-        draw_centered_text(f"Distance: {distance} m", 180, WHITE, font_medium)
-        draw_centered_text(f"Time: {int(total_time)} s", 230, LIGHT_GRAY, font_medium)
-        draw_centered_text("Top 5 Scores:", 290, (255, 255, 0), font_medium)
+        draw_centered_text("Game Over", 100, (255, 100, 100), resources.font_large)
+        draw_centered_text(f"Distance: {distance} m", 180, WHITE, resources.font_medium)
+        draw_centered_text(f"Time: {int(total_time)} s", 230, LIGHT_GRAY, resources.font_medium)
+        draw_centered_text("Top 5 Scores:", 290, (255, 255, 0), resources.font_medium)
         for i, entry in enumerate(highscores):
             score_text = f"{i+1}. {entry['score']} m - {entry['time']}s"
-            draw_centered_text(score_text, 330 + i * 30, WHITE, font_small)
-        draw_centered_text("Press R to Restart", 500, LIGHT_GRAY, font_small)
-        draw_centered_text("Press B back to Main Manu", 550, LIGHT_GRAY, font_small)
-
-        pygame.display.flip()
-        for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    pygame.quit()
-                    exit()
-                if event.key == pygame.K_b:
-                    return "menu"
-                if event.key == pygame.K_r:
-                    return "restart"
+            draw_centered_text(score_text, 330 + i * 30, WHITE, resources.font_small)
+        draw_centered_text("Press R to Restart", 500, LIGHT_GRAY, resources.font_small)
+        draw_centered_text("Press B back to Main Manu", 550, LIGHT_GRAY, resources.font_small)
+
+    def handle_event(event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                pygame.quit()
+                exit()
+            if event.key == pygame.K_b:
+                return "menu"
+            if event.key == pygame.K_r:
+                return "restart"
+
+    return run_screen(draw, handle_event)
 
 
 def show_pause_menu():
@@ -209,9 +266,9 @@ def show_pause_menu():
     # --- 左對齊文字（以框的左側為基準 + padding）---
     padding_x = 20
     padding_y = 20
-    draw_text_left("Paused", box_x + padding_x, box_y + padding_y, WHITE, font_large)
-    draw_text_left("Press ESC to Resume", box_x + padding_x, box_y + padding_y + 90, LIGHT_GRAY, font_small)
-    draw_text_left("Press Q to Quit", box_x + padding_x, box_y + padding_y + 120, LIGHT_GRAY, font_small)
+    draw_text_left("Paused", box_x + padding_x, box_y + padding_y, WHITE, resources.font_large)
+    draw_text_left("Press ESC to Resume", box_x + padding_x, box_y + padding_y + 90, LIGHT_GRAY, resources.font_small)
+    draw_text_left("Press Q to Quit", box_x + padding_x, box_y + padding_y + 120, LIGHT_GRAY, resources.font_small)
 
     pygame.display.flip()
 
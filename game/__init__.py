@@ -2,17 +2,10 @@
 
 # 導出主要類別與功能，讓外部可以 from game import Player 等用法
 
-from game.entities import Player, Obstacle
-from game.level import generate_chunk, ensure_starting_platforms
-from common.ui import (
-    show_main_menu,
-    show_game_over,
-    show_pause_menu,
-    draw_text,
-    draw_centered_text,
-    draw_text_left,
-    draw_key_highlight_line
-)
+from game.entities import Player, Obstacle, Controls
+from game.simulation import Simulation
+from game.profiler import FrameProfiler
+from game.level import generate_chunk, generate_chunk_grid, grid_sprites, ensure_starting_platforms
 from .settings import (
     WIDTH,
     HEIGHT,
@@ -25,9 +18,27 @@ from .settings import (
     LIGHT_GRAY,
     NORMAL_GRAY,
     KEY_HIGHLIGHT,
-    font,
-    font_small,
-    font_medium,
-    font_large,
     MUSIC_PATH,
 )
+
+# 選單與字型用到時才載入（common.ui / 字型檔），import game 不初始化 pygame
+_UI_NAMES = {
+    "show_main_menu",
+    "show_game_over",
+    "show_pause_menu",
+    "draw_text",
+    "draw_centered_text",
+    "draw_text_left",
+    "draw_key_highlight_line",
+}
+_FONT_NAMES = {"font", "font_small", "font_medium", "font_large"}
+
+
+def __getattr__(name):
+    if name in _UI_NAMES:
+        import common.ui
+        return getattr(common.ui, name)
+    if name in _FONT_NAMES:
+        from game import resources
+        return getattr(resources, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
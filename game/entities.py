@@ -1,24 +1,42 @@
 import pygame
+from collections import namedtuple
 from game.settings import *
+from game.spatial import nearby
+
+# 一幀的輸入：左、右、跳（跳躍為「剛按下」）
+Controls = namedtuple("Controls", ["left", "right", "jump"], defaults=[False, False, False])
 
 _dflag_ = False
 typed_code = ""
 
+def solid_surface(color):
+    """一格大小、填滿 color 的 Surface"""
+    surface = pygame.Surface((TILE_SIZE, TILE_SIZE))
+    surface.fill(color)
+    return surface
+
+
+# 地形與障礙物都是同色方塊：所有實例共用類別上的同一張 image（第一次建立時才產生），
+# 每個實例只有自己的 rect，一萬格地形也只有兩張 Surface。
 # --- 障礙物類別 ---
 class Obstacle(pygame.sprite.Sprite):
+    image = None
+
     def __init__(self, x, y):
         super().__init__()
-        self.image = pygame.Surface((TILE_SIZE, TILE_SIZE))
-        self.image.fill(GRAY)
-        self.rect = self.image.get_rect(topleft=(x, y))
+        if Obstacle.image is None:
+            Obstacle.image = solid_surface(GRAY)
+        self.rect = pygame.Rect(x, y, TILE_SIZE, TILE_SIZE)
 
 # --- 地形類別 ---
 class Tile(pygame.sprite.Sprite):
+    image = None
+
     def __init__(self, x, y):
         super().__init__()
-        self.image = pygame.Surface((TILE_SIZE, TILE_SIZE))
-        self.image.fill(GREEN)
-        self.rect = self.image.get_rect(topleft=(x, y))
+        if Tile.image is None:
+            Tile.image = solid_surface(GREEN)
+        self.rect = pygame.Rect(x, y, TILE_SIZE, TILE_SIZE)
 
 
 # --- 玩家類別 ---
@@ -39,20 +57,26 @@ class Player(pygame.sprite.Sprite):
         self.invincible_timer = 0
         self.jump_pressed_last_frame = False  # 新增跳躍鍵偵測
 
-    def update(self, tiles, scroll, obstacles):
+    def read_keyboard(self):
+        """讀取鍵盤並轉成 Controls（跳躍只偵測剛按下那一幀）"""
         keys = pygame.key.get_pressed()
+        jump = keys[pygame.K_SPACE] and not self.jump_pressed_last_frame
+        self.jump_pressed_last_frame = keys[pygame.K_SPACE]
+        return Controls(left=keys[pygame.K_LEFT], right=keys[pygame.K_RIGHT], jump=jump)
+
+    def step(self, controls, tiles, scroll, obstacles, frame):
+        """純物理更新：不讀鍵盤也不讀時鐘，時間以 frame 計算"""
         dx = 0
-        if keys[pygame.K_LEFT]:
+        if controls.left:
             dx = -5
-        if keys[pygame.K_RIGHT]:
+        if controls.right:
             dx = 5
 
-        # 處理跳躍（只偵測剛按下那一幀）
-        if keys[pygame.K_SPACE] and not self.jump_pressed_last_frame:
+        # 處理跳躍
+        if controls.jump:
             if self.jump_count < self.max_jump_count:
                 self.vel_y = -15
                 self.jump_count += 1
-        self.jump_pressed_last_frame = keys[pygame.K_SPACE]
 
         self.vel_y += 1  # gravity
         if self.vel_y > 10:
@@ -72,33 +96,30 @@ class Player(pygame.sprite.Sprite):
 
         # 碰撞障礙物（加上無敵時間）
         if not _dflag_ and not self.invincible:
-            for obs in obstacles:
+            for obs in nearby(obstacles, self.rect):
                 if self.rect.colliderect(obs.rect):
                     # print("碰到障礙物！", obs.rect.topleft)
                     self.health -= 1
                     self.invincible = True
-                    self.invincible_timer = pygame.time.get_ticks()
+                    self.invincible_timer = frame
                     break
 
-        # 無敵狀態持續 1 秒，並閃爍顏色
-        if self.invincible:
-            current_time = pygame.time.get_ticks()
-            if (current_time // 100) % 2 == 0:
-                self.image.fill(ORANGE)
-            else:
-                self.image.fill(self.base_color)
-
-            if current_time - self.invincible_timer > 1000:
-                self.invincible = False
-                self.image.fill(self.base_color)
-        else:
-            self.image.fill(self.base_color)
+        # 無敵狀態持續 INVINCIBLE_FRAMES 幀
+        if self.invincible and frame - self.invincible_timer > INVINCIBLE_FRAMES:
+            self.invincible = False
 
         scroll[0] = -(self.rect.x - WIDTH // 2)
         scroll[0] = min(0, scroll[0])
 
+    def refresh_image(self, frame):
+        """無敵時閃爍顏色（只有畫面需要）"""
+        if self.invincible and ((frame - self.invincible_timer) // 6) % 2 == 0:
+            self.image.fill(ORANGE)
+        else:
+            self.image.fill(self.base_color)
+
     def collision(self, dx, dy, tiles):
-        for tile in tiles:
+        for tile in nearby(tiles, self.rect):
             if hasattr(tile, "type") and tile.type == "obstacle":
                 continue  # 忽略障礙物
             if self.rect.colliderect(tile.rect):
@@ -1,104 +1,227 @@
 import pygame
+import numpy as np
 from game.settings import *
-from game.entities import Player
-from game.level import generate_chunk, ensure_starting_platforms
-
-class GameState:
-    def __init__(self):
-        # 初始化pygame
-        if not pygame.get_init():
-            pygame.init()
-            
-        self.tiles = None
-        self.obstacles = None
-        self.player = None
-        self.all_sprites = None
-        self.scroll = [0, 0]
+from game.level import TILE, OBSTACLE
+from game.simulation import Simulation
+from game import resources
+
+class GameState(Simulation):
+    def __init__(self, headless=False, seed=None):
+        super().__init__(seed)
         self.start_time = 0
-        self.max_distance = 0
-        self.generated_chunks = 0
-        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        self.screen = None
+        self.clock = None
+        self.use_chunk_cache = True
+        self.chunk_surfaces = {}  # 起始欄 -> 預先畫好的區塊地形
+        self.spare_surfaces = []  # 已回收區塊的 Surface，重畫新區塊時直接沿用
+        self.prerender = None  # 分幀預畫中的區塊：[起始欄, 佔據格, Surface, 下一個要畫的欄]
+        self.dirty_rects = []  # 本幀需要更新到螢幕的區域
+        self.show_draw_stats = False  # 顯示繪製 sprite 數 / 總數
+        self.draw_stats = (0, 0)
+        self.show_profiler = False  # 显示各区段滚动 p50 / p95 / p99（需先设定 profiler）
+        self._profile_lines = []
+        self._last_scroll = None
+        self._last_player_rect = None
+        self._last_overlays = None
+        if not headless:
+            self.open_display()
+
+    def open_display(self):
+        """建立視窗（headless 模式下第一次 render 時才呼叫）"""
+        self.screen = resources.get_display((WIDTH, HEIGHT))
         self.clock = pygame.time.Clock()
-        self.paused = False
-        self.game_over = False
-        self.air_time = 0
-        
+
     def initialize(self):
         """初始化游戏状态"""
-        self.tiles, self.obstacles = generate_chunk(0)
-        ensure_starting_platforms(self.tiles)
-        self.player = Player(100, 100)
-        self.all_sprites = pygame.sprite.Group(self.player)
-        self.scroll = [0, 0]
+        super().initialize()
         self.start_time = pygame.time.get_ticks()
-        self.max_distance = 0
-        self.generated_chunks = 1
-        self.paused = False
-        self.game_over = False
-        self.air_time = 0
-        
-    def get_state(self):
-        """获取当前游戏状态，供AI使用"""
-        return {
-            'player_pos': (self.player.rect.x, self.player.rect.y),
-            'player_health': self.player.health,
-            'max_distance': self.max_distance,
-            'current_chunk': self.generated_chunks,
-            'scroll': self.scroll,
-            'obstacles': [(obs.rect.x, obs.rect.y) for obs in self.obstacles],
-            'tiles': [(tile.rect.x, tile.rect.y) for tile in self.tiles]
-        }
-        
-    def update(self):
-        """更新游戏状态"""
-        if not self.paused and not self.game_over:
-            self.all_sprites.update(self.tiles, self.scroll, self.obstacles)
-            
-            # 生成新地形
-            right_edge = (self.generated_chunks * 30 - 10) * TILE_SIZE
-            if self.player.rect.right > right_edge:
-                new_tiles, new_obs = generate_chunk(self.generated_chunks * 30)
-                self.tiles.add(*new_tiles)
-                self.obstacles.add(*new_obs)
-                self.generated_chunks += 1
-                
-            # 更新最大距离
-            distance = self.player.rect.x // TILE_SIZE
-            self.max_distance = max(self.max_distance, distance)
-            
-            # 检查游戏结束条件
-            if self.player.rect.top > HEIGHT or self.player.health <= 0:
-                self.game_over = True
-                
-            if not self.player.on_ground:
-                self.air_time += 1
+        self.spare_surfaces.extend(self.chunk_surfaces.values())
+        if self.prerender is not None:
+            self.spare_surfaces.append(self.prerender[2])
+            self.prerender = None
+        self.chunk_surfaces = {}
+        if self.screen and self.use_chunk_cache:
+            # 开局就备好区块快取要用的 Surface（第一次写入很慢），游戏中只重画不配置
+            while len(self.spare_surfaces) < CHUNK_SURFACE_POOL:
+                surface = self._new_chunk_surface()
+                surface.fill(WHITE)
+                self.spare_surfaces.append(surface)
+        self._last_scroll = None
+        self._last_player_rect = None
+
+    def update(self, controls=None):
+        """更新游戏状态；未指定 controls 時讀取鍵盤"""
+        if controls is None:
+            controls = self.player.read_keyboard()
+        with self.profiler.section("update"):
+            spawned = self.generated_chunks
+            super().update(controls)
+            if self.pregenerate and self.use_chunk_cache and self.screen and self.generated_chunks == spawned:
+                with self.profiler.section("chunks"):
+                    self._prerender_chunk()
+
+    def _prerender_chunk(self):
+        """
+        區塊進入畫面前先畫好快取，每幀只畫 PRERENDER_COLS 欄，
+        真正出現在畫面時已經畫完，邊界那一幀不必一次畫整個區塊。
+        """
+        if self.prerender is None:
+            for start_col, grid in reversed(self.chunks):
+                if start_col not in self.chunk_surfaces:
+                    self.prerender = [start_col, grid, self._take_surface(), 0]
+                    break
             else:
-                self.air_time = 0
+                return
+        start_col, grid, surface, col = self.prerender
+        last = min(col + PRERENDER_COLS, CHUNK_WIDTH) - 1
+        self._paint_columns(surface, grid, col, last)
+        if last == CHUNK_WIDTH - 1:
+            self.chunk_surfaces[start_col] = surface
+            self.prerender = None
+        else:
+            self.prerender[3] = last + 1
 
-                
     def draw(self):
-        """绘制游戏画面"""
+        """绘制游戏画面，并把需要更新的区域记在 dirty_rects"""
         if self.screen:
+            with self.profiler.section("draw"):
+                self._draw_frame()
+
+    def _draw_frame(self):
+        """draw 的本体，整段记在 profiler 的 draw 区段"""
+        # 只绘制与 [-scroll, -scroll + WIDTH) 重叠的欄位
+        first_col = -self.scroll[0] // TILE_SIZE
+        last_col = (-self.scroll[0] + WIDTH - 1) // TILE_SIZE
+
+        if self.use_chunk_cache:
+            # 区块快取本身含白色背景，只需 fill 没有存活区块盖到的部分
+            self._draw_chunks(first_col, last_col)
+        else:
             self.screen.fill(WHITE)
-            
-            # 绘制地形
-            for tile in self.tiles:
-                shifted_tile = tile.rect.move(self.scroll[0], self.scroll[1])
-                pygame.draw.rect(self.screen, GREEN, shifted_tile)
-                
-            # 绘制障碍物
-            for obs in self.obstacles:
-                shifted_obs = obs.rect.move(self.scroll[0], self.scroll[1])
-                self.screen.blit(obs.image, shifted_obs)
-                
-            # 绘制玩家
-            self.screen.blit(self.player.image, 
-                           (self.player.rect.x + self.scroll[0], 
-                            self.player.rect.y + self.scroll[1]))
-            
-            # 绘制UI
+            self._draw_sprites(first_col, last_col)
+
+        # 绘制玩家
+        self.player.refresh_image(self.frame)
+        player_rect = self.player.rect.move(self.scroll[0], self.scroll[1])
+        self.screen.blit(self.player.image, player_rect)
+
+        # 绘制UI
+        with self.profiler.section("hud"):
             self._draw_ui()
-            
+            if self.show_draw_stats:
+                self._draw_stats()
+            if self.show_profiler:
+                self._draw_profiler()
+
+        # 镜头没动时只需更新玩家新旧位置与 HUD，否则整个画面
+        # （暂停遮罩盖过、刚解除暂停、F2 / F3 开关叠加层时也要，关掉的叠加层才会被盖掉）
+        overlays = (self.show_draw_stats, self.show_profiler)
+        if (self.paused or self._last_player_rect is None or self.scroll != self._last_scroll
+                or overlays != self._last_overlays):
+            self.dirty_rects = [self.screen.get_rect()]
+        else:
+            self.dirty_rects = [self._last_player_rect.union(player_rect), pygame.Rect(HUD_RECT)]
+            if self.show_draw_stats:
+                self.dirty_rects.append(pygame.Rect(STATS_RECT))
+            if self.show_profiler:
+                self.dirty_rects.append(pygame.Rect(PROFILE_RECT))
+        self._last_scroll = list(self.scroll)
+        self._last_overlays = overlays
+        self._last_player_rect = None if self.paused else player_rect
+
+    def _chunk_surface(self, start_col, grid):
+        """区块第一次出现在画面时把佔據格画进一张 Surface，之后直接 blit"""
+        surface = self.chunk_surfaces.get(start_col)
+        if surface is None:
+            if self.prerender is not None and self.prerender[0] == start_col:
+                # 预画到一半就进入画面：把剩下的欄补完
+                _, _, surface, col = self.prerender
+                self.prerender = None
+            else:
+                surface, col = self._take_surface(), 0
+            self._paint_columns(surface, grid, col, CHUNK_WIDTH - 1)
+            self.chunk_surfaces[start_col] = surface
+        return surface
+
+    def _paint_columns(self, surface, grid, first, last):
+        """把佔據格第 first..last 欄画到区块 Surface 上"""
+        surface.fill(WHITE, (first * TILE_SIZE, 0, (last - first + 1) * TILE_SIZE, HEIGHT))
+        for kind, color in ((TILE, GREEN), (OBSTACLE, GRAY)):
+            rows, cols = np.nonzero(grid[:, first:last + 1] == kind)
+            for row, col in zip(rows.tolist(), (cols + first).tolist()):
+                surface.fill(color, (col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+
+    def _take_surface(self):
+        return self.spare_surfaces.pop() if self.spare_surfaces else self._new_chunk_surface()
+
+    def _new_chunk_surface(self):
+        """直接以视窗的像素格式建立，不必再 convert（convert 会多复制一次整张 Surface）"""
+        display = pygame.display.get_surface()
+        if display is not None:
+            return pygame.Surface((CHUNK_WIDTH * TILE_SIZE, HEIGHT), 0, display)
+        return pygame.Surface((CHUNK_WIDTH * TILE_SIZE, HEIGHT))
+
+    def _draw_chunks(self, first_col, last_col):
+        """只 blit 与画面重叠的区块快取"""
+        live = set()
+        drawn = 0
+        total = 0
+        for start_col, grid in self.chunks:
+            live.add(start_col)
+            count = np.count_nonzero(grid)
+            total += count
+            if start_col + CHUNK_WIDTH <= first_col or start_col > last_col:
+                continue
+            surface = self._chunk_surface(start_col, grid)
+            self.screen.blit(surface, (start_col * TILE_SIZE + self.scroll[0], self.scroll[1]))
+            drawn += count
+        self.draw_stats = (drawn, total)
+
+        # 存活区块是连续的一段，画面超出这段的部分没有快取盖到，要自己补上背景
+        left = self.chunks[0][0] * TILE_SIZE + self.scroll[0]
+        right = self.generated_chunks * CHUNK_WIDTH * TILE_SIZE + self.scroll[0]
+        if left > 0:
+            self.screen.fill(WHITE, (0, 0, left, HEIGHT))
+        if right < WIDTH:
+            self.screen.fill(WHITE, (right, 0, WIDTH - right, HEIGHT))
+
+        # 已回收的区块把 Surface 留给之后的新区块
+        if len(self.chunk_surfaces) > len(live):
+            for start_col in list(self.chunk_surfaces):
+                if start_col not in live:
+                    self.spare_surfaces.append(self.chunk_surfaces.pop(start_col))
+
+    def _draw_sprites(self, first_col, last_col):
+        """不使用快取时只绘制画面内欄位的 sprite，用 blits 一次送出，不另外建立位移后的 Rect"""
+        sx, sy = self.scroll
+        visible = self.tiles.in_columns(first_col, last_col)
+        visible += self.obstacles.in_columns(first_col, last_col)
+        self.screen.blits([(sprite.image, (sprite.rect.x + sx, sprite.rect.y + sy)) for sprite in visible], False)
+        self.draw_stats = (len(visible), sum(np.count_nonzero(grid) for _, grid in self.chunks))
+
+    def _draw_stats(self):
+        """左下角显示绘制 sprite 数 / 总数，用来确认视口裁切"""
+        from common.ui import draw_text
+        drawn, total = self.draw_stats
+        draw_text(f"Sprites: {drawn} / {total}", STATS_RECT[0] + 10, STATS_RECT[1] + 5, BLACK, resources.font_small)
+
+    def _draw_profiler(self):
+        """右上角显示 profiler 各区段的滚动百分位数；每 PROFILE_REFRESH 帧才重算"""
+        from common.ui import draw_text
+        if not self.profiler.enabled:
+            return
+        if not self._profile_lines or self.frame % PROFILE_REFRESH == 0:
+            self._profile_lines = [("ms", "p50", "p95", "p99")] + [
+                (name, f"{p['p50']:.2f}", f"{p['p95']:.2f}", f"{p['p99']:.2f}")
+                for name, p in self.profiler.percentiles().items()
+            ]
+        x, y, w, h = PROFILE_RECT
+        self.screen.fill(LIGHT_GRAY, PROFILE_RECT)
+        for i, row in enumerate(self._profile_lines):
+            # 字型不是等寬，每欄各自对齐
+            for j, cell in enumerate(row):
+                draw_text(cell, x + 10 + j * 80, y + 5 + i * 20, BLACK, resources.get_font(16))
+
     def _draw_ui(self):
         """绘制UI元素"""
         # 绘制血量
@@ -108,7 +231,7 @@ class GameState:
             pygame.draw.rect(self.screen, GRAY, (x, y, 20, 20), 2)
             if i < self.player.health:
                 pygame.draw.rect(self.screen, RED, (x + 2, y + 2, 16, 16))
-                
+
         # 绘制距离
         from common.ui import draw_text
         draw_text(f"Distance: {self.max_distance} m", WIDTH - 250, 10, BLACK)
@@ -1,94 +1,164 @@
 import pygame
 import random
-from game.settings import WIDTH, HEIGHT, TILE_SIZE
+import numpy as np
+from game.settings import WIDTH, HEIGHT, TILE_SIZE, CHUNK_WIDTH
 from game.entities import Tile, Obstacle
 
+# --- 佔據格 ---
+# 區塊以 (列, 欄) 的 uint8 陣列表示，每格為 EMPTY / TILE / OBSTACLE。
+# 生成時只寫陣列，不建立 sprite；需要畫面或碰撞時再用 grid_sprites 轉成 sprite。
+EMPTY, TILE, OBSTACLE = 0, 1, 2
+ROWS = HEIGHT // TILE_SIZE
+
 
 # --- 地圖生成（延伸） ---
-def ensure_starting_platforms(tiles):
+def ensure_starting_platforms(grid):
     y_base = HEIGHT // TILE_SIZE - 3
-    for i in range(5):
-        x = i * TILE_SIZE
-        y = y_base * TILE_SIZE
-        tile = Tile(x, y)
-        tiles.add(tile)
-
-  
-  
+    grid[y_base, :5] = TILE
+
+
+
 # 隨機決定這次平台寬度
-def add_base_platform(x, y, platform_width, width, tiles, obstacles, start_x, difficulty, occupied_tiles):
-    for i in range(platform_width):
-        if x + i < width:
-            tx = (start_x + x + i) * TILE_SIZE
-            ty = y * TILE_SIZE
-            grid_pos = ((start_x + x + i), y)
-
-            if grid_pos not in occupied_tiles:
-                tile = Tile(tx, ty)
-                tiles.add(tile)
-                occupied_tiles.add(grid_pos)
-
-                # 障礙物檢查不要重疊
-                if tx >= 5 * TILE_SIZE and random.random() < 0.3 * difficulty:
-                    obstacle_pos = (grid_pos[0], grid_pos[1] - 1)
-                    if obstacle_pos not in occupied_tiles:
-                        obs = Obstacle(tx, ty - TILE_SIZE)
-                        obstacles.add(obs)
-                        occupied_tiles.add(obstacle_pos)
+def add_base_platform(x, y, platform_width, grid, start_x, difficulty, rng=random):
+    end = min(x + platform_width, grid.shape[1])
+    row = grid[y, x:end]
+    above = grid[y - 1, x:end]
+    new = row == EMPTY
+    row[new] = TILE
+
+    # 障礙物檢查不要重疊；每個新放的地形格依序各抽一次亂數，與逐格放置相同
+    for i in np.flatnonzero(new).tolist():
+        if start_x + x + i >= 5 and rng.random() < 0.3 * difficulty and above[i] == EMPTY:
+            above[i] = OBSTACLE
 
 
 # 懸空平台（浮台）
-def add_floating_platforms(x, y, width, tiles, start_x, occupied_tiles):
-    if random.random() < 0.2:
-        for i in range(random.randint(1, 3)):
-            fy = max(2, y - random.randint(2, 4))
-            fx = x + i * random.randint(2, 4)
-            grid_pos = (start_x + fx, fy)
-            if fx < width and grid_pos not in occupied_tiles:
-                tx = (start_x + fx) * TILE_SIZE
-                ty = fy * TILE_SIZE
-                tile = Tile(tx, ty)
-                tiles.add(tile)
-                occupied_tiles.add(grid_pos)
+def add_floating_platforms(x, y, grid, rng=random):
+    width = grid.shape[1]
+    if rng.random() < 0.2:
+        for i in range(rng.randint(1, 3)):
+            fy = max(2, y - rng.randint(2, 4))
+            fx = x + i * rng.randint(2, 4)
+            if fx < width and grid[fy, fx] == EMPTY:
+                grid[fy, fx] = TILE
 
 
 # 階梯坡道
-def add_stairs(x, y, width, tiles, start_x, occupied_tiles):
-    if random.random() < 0.3:
+def add_stairs(x, y, grid, rng=random):
+    width = grid.shape[1]
+    if rng.random() < 0.3:
         for step in range(3):
-            sy = max(2, y - step)            
-            if x + step < width and (start_x + x + step, sy) not in occupied_tiles:
-                tx = (start_x + x + step) * TILE_SIZE
-                ty = sy * TILE_SIZE
-                grid_pos = (start_x + x + step, sy)
-                tile = Tile(tx, ty)
-                tiles.add(tile)
-                occupied_tiles.add(grid_pos)
-
+            sy = max(2, y - step)
+            if x + step < width and grid[sy, x + step] == EMPTY:
+                grid[sy, x + step] = TILE
 
 
-def generate_chunk(start_x, height=15, width=30, difficulty=1.0):
 
+def place_platforms(grid, start_x, difficulty=1.0, rng=random):
+    """
+    在空的佔據格上依序放置平台、浮台與階梯。
+    每放完一段就 yield 一次，呼叫端可以一次跑完，也可以分散在多幀裡推進。
+    """
+    height, width = grid.shape
     x = 0
     y = height - 3
     step_range = max(2, int(5 - difficulty))  # 間距小 = 更密集地形
     height_variation = min(int(difficulty * 2), 3)  # 高低差更劇烈
-    occupied_tiles = set() 
-    
-    tiles = pygame.sprite.Group()
-    obstacles = pygame.sprite.Group()
-    
-    platform_width = random.randint(2, 5) if difficulty < 2 else random.randint(1, 3)
+
+    platform_width = rng.randint(2, 5) if difficulty < 2 else rng.randint(1, 3)
 
     while x < width:
-        y += random.choice([-height_variation, 0, height_variation])
+        y += rng.choice([-height_variation, 0, height_variation])
         y = max(2, min(height - 2, y))
-        
-        add_base_platform(x, y, platform_width, width, tiles, obstacles, start_x, difficulty, occupied_tiles)
-        add_floating_platforms(x, y, width, tiles, start_x, occupied_tiles)
-        add_stairs(x, y, width, tiles, start_x, occupied_tiles)
-                        
-        x += random.randint(step_range, step_range + 2)
-        # print(f"Chunk at {start_x}: {len(tiles)} tiles, {len(obstacles)} obstacles")
-                
+
+        add_base_platform(x, y, platform_width, grid, start_x, difficulty, rng)
+        add_floating_platforms(x, y, grid, rng)
+        add_stairs(x, y, grid, rng)
+
+        x += rng.randint(step_range, step_range + 2)
+        yield
+
+
+def generate_chunk_grid(start_x, height=15, width=30, difficulty=1.0, rng=random):
+    """生成一個區塊的 (height, width) 佔據格；rng 預設為全域 random"""
+    grid = np.zeros((height, width), dtype=np.uint8)
+    for _ in place_platforms(grid, start_x, difficulty, rng):
+        pass
+    return grid
+
+
+def grid_sprites(grid, start_col, first=0, last=None):
+    """
+    把佔據格第 first..last 欄（區塊內欄位，含兩端）轉成 Tile / Obstacle sprite。
+    回傳 (tiles, obstacles) 兩個 Group。
+    """
+    tiles = pygame.sprite.Group()
+    obstacles = pygame.sprite.Group()
+    stop = grid.shape[1] if last is None else last + 1
+    # 依欄再依列走訪，與逐格生成的加入順序一致
+    cells = grid[:, first:stop].T
+    cols, rows = np.nonzero(cells)
+    kinds = cells[cols, rows]
+    for col, row, kind in zip((cols + start_col + first).tolist(), rows.tolist(), kinds.tolist()):
+        if kind == TILE:
+            tiles.add(Tile(col * TILE_SIZE, row * TILE_SIZE))
+        else:
+            obstacles.add(Obstacle(col * TILE_SIZE, row * TILE_SIZE))
     return tiles, obstacles
+
+
+def generate_chunk(start_x, height=15, width=30, difficulty=1.0, rng=random):
+    """生成一個區塊並直接轉成 sprite（等同 generate_chunk_grid + grid_sprites）"""
+    return grid_sprites(generate_chunk_grid(start_x, height, width, difficulty, rng), start_x)
+
+
+# --- 世界種子 ---
+# 每個區塊的亂數只由 (world_seed, chunk_index) 決定，
+# 同一個世界的任何區塊都能隨時重新生成，回收的區塊不必保存。
+def new_world_seed(rng=random):
+    """挑一個新的世界種子（預設取自全域 random，random.seed 之後可重現）"""
+    return rng.randrange(2 ** 32)
+
+
+def chunk_rng(world_seed, chunk_index):
+    """第 chunk_index 個區塊專用的亂數產生器（字串種子不受 PYTHONHASHSEED 影響）"""
+    return random.Random(f"{world_seed}:{chunk_index}")
+
+
+class ChunkBuilder:
+    """
+    分段生成世界中的第 chunk_index 個區塊：每次 step 只放幾段平台，
+    可以在區塊真正需要之前分散到多幀完成。結果與一次生成完全相同。
+    """
+
+    def __init__(self, world_seed, chunk_index, width=CHUNK_WIDTH):
+        self.chunk_index = chunk_index
+        self.grid = np.zeros((ROWS, width), dtype=np.uint8)
+        self.done = False
+        self._steps = place_platforms(self.grid, chunk_index * width, rng=chunk_rng(world_seed, chunk_index))
+
+    def step(self, count=1):
+        """推進最多 count 段，回傳是否已完成"""
+        while not self.done and count > 0:
+            if next(self._steps, False) is False:
+                if self.chunk_index == 0:
+                    ensure_starting_platforms(self.grid)
+                self.done = True
+            count -= 1
+        return self.done
+
+    def finish(self):
+        """把剩下的段落一次做完，回傳佔據格"""
+        while not self.step(8):
+            pass
+        return self.grid
+
+
+def generate_world_chunk_grid(world_seed, chunk_index, width=CHUNK_WIDTH):
+    """生成世界中第 chunk_index 個區塊的佔據格，第 0 個區塊含起始平台"""
+    return ChunkBuilder(world_seed, chunk_index, width).finish()
+
+
+def generate_world_chunk(world_seed, chunk_index, width=CHUNK_WIDTH):
+    """同 generate_world_chunk_grid，但回傳 (tiles, obstacles) sprite"""
+    return grid_sprites(generate_world_chunk_grid(world_seed, chunk_index, width), chunk_index * width)
@@ -1,7 +1,7 @@
 # Description: 主程式檔案，負責遊戲的初始化、遊戲迴圈、遊戲狀態的管理
 
 # --- Python 標準函式庫 ---
-import os
+import atexit
 import json
 import time
 
@@ -12,13 +12,10 @@ import pygame
 import game.entities as entities
 from game.settings import *
 from game.gamestate import GameState
+from game import resources
+from game.profiler import FrameProfiler
 from common.ui import show_main_menu, show_game_over, show_pause_menu
 
-# --- 初始化 ---
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
-
 # --- 排行榜儲存 ---
 def save_high_score(score, time_survived, mode="normal"):
     score_data = {
@@ -46,7 +43,17 @@ def load_high_scores():
     except (FileNotFoundError, json.JSONDecodeError):
         return []
 
-def main():
+def main(profile_csv=None):
+    """profile_csv：結束時把幀時間分析寫到這個 CSV（遊戲中也可以按 F4 隨時輸出）"""
+    # --- 初始化（在這裡而不是 import 時開視窗） ---
+    screen = resources.get_display((WIDTH, HEIGHT))
+    resources.init_mixer()
+    clock = pygame.time.Clock()
+    profiler = FrameProfiler()
+    show_profiler = False
+    if profile_csv:
+        # 選單裡離開會直接 exit()，用 atexit 確保一定寫出
+        atexit.register(profiler.dump_csv, profile_csv)
     running = True
 
     while running:
@@ -57,16 +64,19 @@ def main():
             state = GameState()
             state.screen = screen
             state.clock = clock
+            state.profiler = profiler
+            state.show_profiler = show_profiler
             state.initialize()
             
-            pygame.mixer.music.load(os.path.join(MUSIC_PATH, "Title_Screen.wav"))
-            pygame.mixer.music.play(-1)
+            resources.play_music("Title_Screen.wav")
             
             typed_code = ""
             
             while not state.game_over:
                 # --- 按鈕處理 ---
-                for event in pygame.event.get():
+                # 暫停畫面不會動，沒有輸入時阻塞等待而不是空轉重畫
+                events = [pygame.event.wait()] + pygame.event.get() if state.paused else pygame.event.get()
+                for event in events:
                     # 離開遊戲
                     if event.type == pygame.QUIT:
                         running = False            
@@ -82,6 +92,17 @@ def main():
                         else:
                             if event.key == pygame.K_ESCAPE:
                                 state.paused = True  # 進入暫停選單
+
+                        # F2 切換繪製統計
+                        if event.key == pygame.K_F2:
+                            state.show_draw_stats = not state.show_draw_stats
+
+                        # F3 切換幀時間分析，F4 輸出 CSV
+                        if event.key == pygame.K_F3:
+                            show_profiler = state.show_profiler = not state.show_profiler
+                        if event.key == pygame.K_F4:
+                            path = time.strftime("profile_%Y%m%d_%H%M%S.csv")
+                            print(f"已輸出 {profiler.dump_csv(path)} 幀的分析到 {path}")
                                 
                         if event.unicode:
                             typed_code += event.unicode
@@ -91,6 +112,7 @@ def main():
                                 print("I'm god!")
                                 typed_code = ""
 
+                profiler.begin_frame()
                 state.update()
                 state.draw()
                 
@@ -111,8 +133,12 @@ def main():
                         in_game = False
                         break
                     
-                pygame.display.flip()
-                clock.tick(60)
+                # 暫停時 show_pause_menu 已經 flip，其餘只更新有變動的區域
+                if not state.paused:
+                    with profiler.section("flip"):
+                        pygame.display.update(state.dirty_rects)
+                profiler.end_frame()
+                clock.tick(FPS)
                 
     pygame.quit()
     
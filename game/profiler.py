@@ -0,0 +1,138 @@
+import csv
+import time
+from collections import deque
+import numpy as np
+from game.settings import PROFILE_WINDOW
+
+# --- 幀時間分析 ---
+# 遊戲迴圈各階段用 profiler.section(名稱) 包起來計時，每幀結束時 end_frame 收成一筆紀錄。
+# 只保留最近 PROFILE_WINDOW 幀，可以隨時查滾動百分位數或輸出 CSV 到目標機器上離線分析。
+# 區段可以巢狀（update 內含 collision / chunks），各自的時間都是實際經過的時間。
+
+SECTIONS = ("update", "collision", "chunks", "draw", "hud", "flip", "frame")
+
+
+class _Section:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, (time.perf_counter() - self.start) * 1000)
+
+
+class FrameProfiler:
+    """
+    記錄每幀各區段的耗時（毫秒）。
+    section(name) 計時一個區段；end_frame() 結束一幀並通知 add_hook 註冊的回呼；
+    percentiles() 取滾動 p50 / p95 / p99；dump_csv() 把保留的每幀紀錄寫成 CSV。
+    """
+
+    enabled = True
+
+    def __init__(self, window=PROFILE_WINDOW):
+        self.frames = deque(maxlen=window)  # 每幀一個 {區段: 毫秒}
+        self.frame_count = 0
+        self.hooks = []
+        self._current = {}
+        self._sections = {}
+        self._frame_start = None
+
+    def section(self, name):
+        """with profiler.section("draw"): ... 計時一個區段；同一幀重複進入會累加"""
+        ctx = self._sections.get(name)
+        if ctx is None:
+            ctx = self._sections[name] = _Section(self, name)
+        return ctx
+
+    def record(self, name, ms):
+        """直接加入一個區段的耗時（不方便用 with 的地方）"""
+        self._current[name] = self._current.get(name, 0.0) + ms
+
+    def begin_frame(self):
+        self._frame_start = time.perf_counter()
+
+    def end_frame(self):
+        """結束這一幀：補上整幀耗時、存入滾動視窗並呼叫 hook(frame_index, times)"""
+        if self._frame_start is not None:
+            self.record("frame", (time.perf_counter() - self._frame_start) * 1000)
+            self._frame_start = None
+        times, self._current = self._current, {}
+        self.frames.append(times)
+        for hook in self.hooks:
+            hook(self.frame_count, times)
+        self.frame_count += 1
+
+    def add_hook(self, hook):
+        """每幀結束時呼叫 hook(frame_index, {區段: 毫秒})"""
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def reset(self):
+        self.frames.clear()
+        self._current = {}
+        self._frame_start = None
+
+    def names(self):
+        """出現過的區段，SECTIONS 中的依固定順序排前面"""
+        seen = {name for times in self.frames for name in times}
+        return [name for name in SECTIONS if name in seen] + sorted(seen - set(SECTIONS))
+
+    def percentiles(self, qs=(50, 95, 99)):
+        """{區段: {"p50": 毫秒, ...}}；只計算該區段有出現的幀"""
+        result = {}
+        for name in self.names():
+            samples = [times[name] for times in self.frames if name in times]
+            values = np.percentile(samples, qs)
+            result[name] = {f"p{q}": float(v) for q, v in zip(qs, values)}
+        return result
+
+    def dump_csv(self, path):
+        """每幀一列：frame, 各區段毫秒（該幀沒有的區段留空），回傳寫入的幀數"""
+        names = self.names()
+        first = self.frame_count - len(self.frames)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + [f"{name}_ms" for name in names])
+            for i, times in enumerate(self.frames):
+                writer.writerow([first + i] + [f"{times[name]:.4f}" if name in times else "" for name in names])
+        return len(self.frames)
+
+
+class _NullSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+class NullProfiler:
+    """不計時的 profiler，Simulation 預設使用，訓練環境不必付計時的成本"""
+
+    enabled = False
+    _section = _NullSection()
+
+    def section(self, name):
+        return self._section
+
+    def record(self, name, ms):
+        pass
+
+    def begin_frame(self):
+        pass
+
+    def end_frame(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
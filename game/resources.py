@@ -0,0 +1,63 @@
+import os
+import pygame
+from game.settings import FONTS_PATH, MUSIC_PATH
+
+# --- 延遲建立的資源 ---
+# settings 只放常數；字型、音效、視窗都在第一次用到時才初始化，
+# 所以 import game / ai 不會碰到字型檔、音效裝置或開視窗。
+
+FONT_SIZES = {
+    "font": 20,
+    "font_large": 60,    # 大字型
+    "font_medium": 30,   # 中等字型
+    "font_small": 20,    # 小字型
+}
+_fonts = {}
+
+
+def get_font(size):
+    """依字級取得 DejaVuSans 字型，第一次使用時才載入"""
+    font = _fonts.get(size)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        if not _fonts:
+            # pygame.quit() 之後舊的 Font 物件已失效，不能再拿來 render
+            pygame.register_quit(_fonts.clear)
+        font = _fonts[size] = pygame.font.Font(FONTS_PATH, size)
+    return font
+
+
+def __getattr__(name):
+    # resources.font_medium 等名稱對應到 get_font
+    if name in FONT_SIZES:
+        return get_font(FONT_SIZES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def init_mixer():
+    """初始化音效；沒有音效裝置時回傳 False 而不是讓程式中止"""
+    if pygame.mixer.get_init():
+        return True
+    try:
+        pygame.mixer.init()
+    except pygame.error:
+        return False
+    return True
+
+
+def play_music(filename, loops=-1):
+    """播放 assets/music 下的音樂，沒有音效裝置就靜音略過"""
+    if init_mixer():
+        pygame.mixer.music.load(os.path.join(MUSIC_PATH, filename))
+        pygame.mixer.music.play(loops)
+
+
+def get_display(size):
+    """回傳目前的視窗，還沒有就建立"""
+    if not pygame.get_init():
+        pygame.init()
+    screen = pygame.display.get_surface()
+    if screen is None or screen.get_size() != tuple(size):
+        screen = pygame.display.set_mode(size)
+    return screen
@@ -1,6 +1,7 @@
-import pygame
 import os
 
+# 只放常數，import 時不初始化 pygame；字型、音效、視窗見 game/resources.py
+
 # 根目錄
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -11,6 +12,24 @@ MUSIC_PATH = os.path.join(ASSETS_PATH, 'music')
 # 畫面尺寸
 WIDTH, HEIGHT = 800, 600
 TILE_SIZE = 40
+HUD_RECT = (0, 0, WIDTH, 50)  # 血量與距離所在的畫面上緣
+STATS_RECT = (0, HEIGHT - 35, 300, 35)  # 除錯用繪製統計（F2 切換）
+PROFILE_RECT = (WIDTH - 330, 50, 330, 170)  # 幀時間分析（F3 切換）
+
+# --- 時間（以幀計算） ---
+FPS = 60
+INVINCIBLE_FRAMES = 60  # 受傷後無敵 1 秒
+PROFILE_WINDOW = 600  # 幀時間分析保留的幀數（10 秒）
+PROFILE_REFRESH = 30  # 分析面板每隔幾幀重算一次百分位數
+
+# --- 地圖區塊 ---
+CHUNK_WIDTH = 30     # 每個區塊的欄數
+CHUNKS_BEHIND = 1    # 畫面左側保留的區塊數，更早的區塊會被回收
+CHUNKS_AHEAD = 1     # 畫面右側預先生成的區塊數
+PREGEN_STEPS = 2     # 每幀預先生成下一個區塊的段數，跨到區塊邊界前就已生成好
+CHUNK_SURFACE_POOL = CHUNKS_BEHIND + CHUNKS_AHEAD + 2  # 同時存活的區塊快取上限，開局預先配置
+PRERENDER_COLS = 10   # 區塊快取每幀預畫的欄數
+SPRITE_MARGIN = 2    # 畫面左右各多建立幾欄 sprite（玩家碰撞用），其餘地形只存佔據格
 
 # --- 顏色 ---
 WHITE = (255, 255, 255)
@@ -24,15 +43,5 @@ NORMAL_GRAY= (150, 150, 150)
 ORANGE = (255, 165, 0)
 KEY_HIGHLIGHT = (100, 180, 255)
 
-# --- 音樂 ---
-pygame.mixer.init()
-
-
 # --- 字型 ---
-pygame.font.init()
 FONTS_PATH = os.path.join(ASSETS_PATH, 'fonts/DejaVuSans.ttf')
-font = pygame.font.Font(FONTS_PATH, 20)
-font_large = pygame.font.Font(FONTS_PATH, 60)    # 定義大字型
-font_medium = pygame.font.Font(FONTS_PATH, 30)   # 定義中等字型
-font_small = pygame.font.Font(FONTS_PATH, 20)    # 定義小字型
-
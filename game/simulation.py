@@ -0,0 +1,195 @@
+import pygame
+import numpy as np
+from collections import deque
+from game.settings import *
+from game.entities import Player, Controls
+from game.level import TILE, OBSTACLE, ChunkBuilder, grid_sprites, new_world_seed
+from game.spatial import ColumnGroup, HeightMap
+from game.profiler import NULL_PROFILER
+
+
+class Simulation:
+    """
+    不依賴視窗、鍵盤與時鐘的遊戲核心。
+    輸入由 update(controls) 明確傳入，時間以 frame 計數，
+    GameState（畫面版本）與 PixelJumperEnv（訓練環境）共用同一份邏輯。
+    seed 固定時每次 initialize 都是同一個世界；None 則每次挑新的世界種子。
+    地形以區塊佔據格保存，tiles / obstacles 只含畫面附近（SPRITE_MARGIN）的 sprite，
+    tile_heights / obstacle_heights 則是整個滑動視窗的高度圖。
+    """
+
+    def __init__(self, seed=None):
+        self.seed = seed
+        self.world_seed = None
+        self.tiles = None
+        self.obstacles = None
+        self.tile_heights = None
+        self.obstacle_heights = None
+        self.sprite_columns = (0, -1)  # 目前已建立 sprite 的欄位範圍（含兩端）
+        self.player = None
+        self.all_sprites = None
+        self.scroll = [0, 0]
+        self.frame = 0
+        self.max_distance = 0
+        self.generated_chunks = 0
+        self.chunks = deque()  # (起始欄, 佔據格)，依起始欄排序
+        self.pregenerate = True  # 每幀分段預先生成下一個區塊
+        self.next_chunk = None  # 預先生成中的 ChunkBuilder
+        self.profiler = NULL_PROFILER  # 換成 FrameProfiler 即可計時各區段
+        self.paused = False
+        self.game_over = False
+        self.air_time = 0
+
+    def initialize(self):
+        """初始化遊戲狀態"""
+        self.tiles = ColumnGroup()
+        self.obstacles = ColumnGroup()
+        self.tile_heights = HeightMap()
+        self.obstacle_heights = HeightMap()
+        self.sprite_columns = (0, -1)
+        self.chunks = deque()
+        self.generated_chunks = 0
+        self.next_chunk = None
+        self.world_seed = self.seed if self.seed is not None else new_world_seed()
+        self._spawn_chunk()
+        self._update_sprites(0, WIDTH // TILE_SIZE)
+        self.player = Player(100, 100)
+        self.all_sprites = pygame.sprite.Group(self.player)
+        self.scroll = [0, 0]
+        self.frame = 0
+        self.max_distance = 0
+        self.paused = False
+        self.game_over = False
+        self.air_time = 0
+
+    def _spawn_chunk(self):
+        """生成下一個區塊並加入世界"""
+        start_col = self.generated_chunks * CHUNK_WIDTH
+        builder = self.next_chunk
+        if builder is None or builder.chunk_index != self.generated_chunks:
+            builder = ChunkBuilder(self.world_seed, self.generated_chunks)
+        grid = builder.finish()  # 預先生成完的區塊直接取用，沒做完的部分在這裡補完
+        self.next_chunk = None
+        self.tile_heights.add_grid(grid, start_col, TILE)
+        self.obstacle_heights.add_grid(grid, start_col, OBSTACLE)
+        self.chunks.append((start_col, grid))
+        self.generated_chunks += 1
+
+    def _pregenerate(self):
+        """每幀只推進下一個區塊 PREGEN_STEPS 段，避免在區塊邊界那一幀一次生成整個區塊"""
+        if self.next_chunk is None:
+            self.next_chunk = ChunkBuilder(self.world_seed, self.generated_chunks)
+        self.next_chunk.step(PREGEN_STEPS)
+
+    def _update_sprites(self, view_left, view_right):
+        """只替畫面附近的欄位建立 sprite，離開範圍的欄位移除"""
+        first = max(view_left - SPRITE_MARGIN, self.chunks[0][0])
+        last = min(view_right + SPRITE_MARGIN, self.generated_chunks * CHUNK_WIDTH - 1)
+        old_first, old_last = self.sprite_columns
+        if (first, last) == (old_first, old_last):
+            return
+
+        # 移除離開範圍的欄位
+        if old_first <= old_last:
+            if old_first < first:
+                self._remove_sprites(old_first, min(old_last, first - 1))
+            if old_last > last:
+                self._remove_sprites(max(old_first, last + 1), old_last)
+
+        # 建立新進入範圍的欄位
+        if old_first > old_last or old_first > last or old_last < first:
+            self._add_sprites(first, last)
+        else:
+            if first < old_first:
+                self._add_sprites(first, old_first - 1)
+            if last > old_last:
+                self._add_sprites(old_last + 1, last)
+        self.sprite_columns = (first, last)
+
+    def _add_sprites(self, first_col, last_col):
+        for start_col, grid in self.chunks:
+            lo = max(first_col, start_col)
+            hi = min(last_col, start_col + CHUNK_WIDTH - 1)
+            if lo <= hi:
+                new_tiles, new_obs = grid_sprites(grid, start_col, lo - start_col, hi - start_col)
+                self.tiles.add(*new_tiles)
+                self.obstacles.add(*new_obs)
+
+    def _remove_sprites(self, first_col, last_col):
+        self.tiles.remove_columns(first_col, last_col)
+        self.obstacles.remove_columns(first_col, last_col)
+
+    def _update_chunks(self):
+        """依鏡頭位置維持滑動視窗：右側預先生成，左側回收"""
+        view_left = -self.scroll[0] // TILE_SIZE
+        view_right = (-self.scroll[0] + WIDTH) // TILE_SIZE
+
+        # 生成新地形
+        while self.generated_chunks * CHUNK_WIDTH <= view_right + CHUNKS_AHEAD * CHUNK_WIDTH:
+            self._spawn_chunk()
+
+        # 回收太舊的區塊（只看最左邊那個，每次 O(1)）
+        keep_from = view_left - CHUNKS_BEHIND * CHUNK_WIDTH
+        while len(self.chunks) > 1 and self.chunks[0][0] + CHUNK_WIDTH <= keep_from:
+            start_col, _ = self.chunks.popleft()
+            last_col = start_col + CHUNK_WIDTH - 1
+            self.tile_heights.remove_columns(start_col, last_col)
+            self.obstacle_heights.remove_columns(start_col, last_col)
+
+        # 回收的區塊遠在畫面左側，不會有 sprite；這裡只需跟著鏡頭增減畫面附近的欄位
+        self._update_sprites(view_left, view_right)
+
+        # 已回收的區域不能再走回去：鏡頭以玩家為中心，玩家至少要離左緣半個畫面，
+        # 畫面才不會照到回收後的空白（還沒回收過時鏡頭本來就停在 0）
+        left_edge = self.chunks[0][0] * TILE_SIZE
+        min_left = left_edge + WIDTH // 2 if left_edge else 0
+        if self.player.rect.left < min_left:
+            self.player.rect.left = min_left
+            self.scroll[0] = min(0, -(self.player.rect.x - WIDTH // 2))
+
+    def get_state(self):
+        """獲取當前遊戲狀態，供AI使用"""
+        return {
+            'player_pos': (self.player.rect.x, self.player.rect.y),
+            'player_health': self.player.health,
+            'max_distance': self.max_distance,
+            'current_chunk': self.generated_chunks,
+            'scroll': self.scroll,
+            'obstacles': self._cells(OBSTACLE),
+            'tiles': self._cells(TILE)
+        }
+
+    def _cells(self, kind):
+        """滑動視窗內所有內容為 kind 的格子左上角座標"""
+        cells = []
+        for start_col, grid in self.chunks:
+            rows, cols = np.nonzero(grid == kind)
+            cells.extend(zip(((cols + start_col) * TILE_SIZE).tolist(), (rows * TILE_SIZE).tolist()))
+        return cells
+
+    def update(self, controls=Controls()):
+        """以給定的輸入推進一幀"""
+        if not self.paused and not self.game_over:
+            with self.profiler.section("collision"):
+                self.player.step(controls, self.tiles, self.scroll, self.obstacles, self.frame)
+            self.frame += 1
+
+            with self.profiler.section("chunks"):
+                spawned = self.generated_chunks
+                self._update_chunks()
+                # 這幀已經接上新區塊就不再預先生成，把工作留給下一幀
+                if self.pregenerate and self.generated_chunks == spawned:
+                    self._pregenerate()
+
+            # 更新最大距離
+            distance = self.player.rect.x // TILE_SIZE
+            self.max_distance = max(self.max_distance, distance)
+
+            # 檢查遊戲結束條件
+            if self.player.rect.top > HEIGHT or self.player.health <= 0:
+                self.game_over = True
+
+            if not self.player.on_ground:
+                self.air_time += 1
+            else:
+                self.air_time = 0
@@ -0,0 +1,128 @@
+import pygame
+import numpy as np
+from bisect import bisect_left, bisect_right, insort
+from game.settings import TILE_SIZE
+
+
+# --- 欄位空間索引 ---
+class ColumnGroup(pygame.sprite.Group):
+    """
+    以地圖欄位（x // TILE_SIZE）為鍵的 Sprite Group。
+    地形與障礙物都對齊格線且不會移動，所以加入/移除時順便維護 columns，
+    碰撞與繪圖只需要查玩家或畫面附近的幾個欄位，不必掃整個世界。
+    下方最近格子的查詢由 HeightMap 負責，這裡不維護高度圖。
+    """
+
+    def __init__(self, *sprites):
+        self.columns = {}  # 欄位 -> {sprite: None}
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite)
+        col = sprite.rect.x // TILE_SIZE
+        bucket = self.columns.get(col)
+        if bucket is None:
+            bucket = self.columns[col] = {}
+        bucket[sprite] = None
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        col = sprite.rect.x // TILE_SIZE
+        bucket = self.columns.get(col)
+        if bucket is not None:
+            bucket.pop(sprite, None)
+            if not bucket:
+                del self.columns[col]
+
+    def in_columns(self, first_col, last_col):
+        """回傳欄位落在 [first_col, last_col] 之間的所有 sprite"""
+        result = []
+        for col in range(first_col, last_col + 1):
+            bucket = self.columns.get(col)
+            if bucket:
+                result.extend(bucket)
+        return result
+
+    def near(self, rect, margin=1):
+        """回傳與 rect 所在欄位相鄰（左右各 margin 欄）的 sprite"""
+        first_col = rect.left // TILE_SIZE - margin
+        last_col = (rect.right - 1) // TILE_SIZE + margin
+        return self.in_columns(first_col, last_col)
+
+    def remove_columns(self, first_col, last_col):
+        """移除欄位落在 [first_col, last_col] 之間的所有 sprite"""
+        sprites = self.in_columns(first_col, last_col)
+        if sprites:
+            self.remove(*sprites)
+
+
+class HeightMap:
+    """
+    直接由區塊佔據格建立的高度圖：每欄最低格子的 top，不需要 sprite。
+    Simulation 只替畫面附近建立 sprite，nearest_below 仍涵蓋整個滑動視窗。
+    """
+
+    def __init__(self):
+        self.sorted_columns = []  # 有格子的欄位（遞增）
+        self.column_lowest = {}  # 欄位 -> 該欄最低格子的 top
+
+    def add_grid(self, grid, start_col, kind):
+        """加入區塊佔據格中內容為 kind 的格子"""
+        mask = grid == kind
+        lowest_row = mask.shape[0] - 1 - np.argmax(mask[::-1], axis=0)
+        for col in np.nonzero(mask.any(axis=0))[0].tolist():
+            self.column_lowest[start_col + col] = int(lowest_row[col]) * TILE_SIZE
+            insort(self.sorted_columns, start_col + col)  # 新區塊在右側，通常等於 append
+
+    def remove_columns(self, first_col, last_col):
+        """移除 [first_col, last_col] 之間的欄位（區塊回收時）"""
+        lo = bisect_left(self.sorted_columns, first_col)
+        hi = bisect_right(self.sorted_columns, last_col)
+        for col in self.sorted_columns[lo:hi]:
+            del self.column_lowest[col]
+        del self.sorted_columns[lo:hi]
+
+    def nearest_below(self, rect):
+        return _nearest_below(self.sorted_columns, self.column_lowest, rect)
+
+
+def _nearest_below(cols, lowest, rect):
+    """
+    位於 rect 下方（top > rect.bottom）最近格子與 rect 的水平中心距離，沒有則為 inf。
+    從 rect 所在欄位往左右兩側依距離由近到遠走訪，找到第一個有下方格子的欄位就停。
+    cols: 排序好的欄位；lowest: 欄位 -> 該欄最低的 top
+    """
+    center = rect.centerx
+    right = bisect_left(cols, center // TILE_SIZE)
+    left = right - 1
+    bottom = rect.bottom
+    while left >= 0 or right < len(cols):
+        left_dist = abs(cols[left] * TILE_SIZE + TILE_SIZE // 2 - center) if left >= 0 else float('inf')
+        right_dist = abs(cols[right] * TILE_SIZE + TILE_SIZE // 2 - center) if right < len(cols) else float('inf')
+        if left_dist <= right_dist:
+            if lowest[cols[left]] > bottom:
+                return left_dist
+            left -= 1
+        else:
+            if lowest[cols[right]] > bottom:
+                return right_dist
+            right += 1
+    return float('inf')
+
+
+def nearby(group, rect):
+    """有欄位索引就只取附近的 sprite，否則退回整個 group"""
+    if hasattr(group, "near"):
+        return group.near(rect)
+    return group
+
+
+def nearest_below(group, rect):
+    """group（HeightMap 或任何 sprite Group）中位於 rect 下方最近格子的水平距離；不是 HeightMap 時退回全掃描"""
+    if hasattr(group, "nearest_below"):
+        return group.nearest_below(rect)
+    nearest = float('inf')
+    for sprite in group:
+        if sprite.rect.top > rect.bottom:
+            nearest = min(nearest, abs(sprite.rect.centerx - rect.centerx))
+    return nearest
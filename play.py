@@ -1,26 +1,27 @@
 # play.py
 import argparse
 from game.main import main
-from game.gamestate import GameState
 
-def run_ai_mode():
-    """AI模式运行游戏"""
-    state = GameState()
-    state.initialize()
-    return state
+def run_ai_mode(model_path):
+    """AI模式运行游戏（NumPy 推论，不载入 PyTorch）"""
+    from ai.play_with_ai import play_with_ai
+    return play_with_ai(model_path)
 
-def run_player_mode():
+def run_player_mode(profile_csv=None):
     """玩家模式运行游戏"""
-    main()
+    main(profile_csv)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='运行平台游戏')
     parser.add_argument('--mode', choices=['player', 'ai'], default='player',
                       help='选择游戏模式：player（玩家模式）或 ai（AI模式）')
+    parser.add_argument('--model', default='models/v3-platform-tune/best_model.pth',
+                      help='AI模式使用的模型（.pth 或 ai/numpy_model.py 汇出的 .npz）')
+    parser.add_argument('--profile', metavar='CSV',
+                      help='结束时把每帧各区段耗时写到 CSV（游戏中 F3 显示、F4 随时输出）')
     args = parser.parse_args()
     
     if args.mode == 'player':
-        run_player_mode()
+        run_player_mode(args.profile)
     else:
-        state = run_ai_mode()
-        print("AI模式已启动，游戏状态已准备就绪")
+        run_ai_mode(args.model)